@@ -0,0 +1,106 @@
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+
+from get_scenes import output_dir
+
+# Representative segments as inclusive animation index ranges (see timeline.py for the indices)
+SEGMENTS = {
+    # Create(grid) over the warped 3D lattice
+    "lattice_create": ("PhysicalBlackHoleLattice", 0, 0),
+    # FadeIn of the header row, the pause, then the LaggedStart over the 8 rows
+    "table_fade_in": ("WhatIsEntropy", 8, 10),
+    # LaggedStartMap(Create, grid) over the polar grid
+    "polar_grid": ("TwoDBlackHole", 2, 2),
+    # Write(planck_length) through the final scale of the entropy formula
+    "final_transforms": ("Outro", 11, 14),
+}
+
+RENDER_SCRIPT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "render.py")
+
+# Metrics where a higher value is a regression, and the one where lower is
+LOWER_IS_BETTER = ("construct", "wall", "peak_rss_mb")
+HIGHER_IS_BETTER = ("fps",)
+
+def run_segment(filepath, name, scene_name, start, end, quality):
+    """Renders one segment in a fresh process and summarises its profile."""
+    output_file = f"bench_{name}"
+    command = [
+        sys.executable, RENDER_SCRIPT, f"-q{quality}", "--profile",
+        "--animations", str(start), str(end), "--output-file", output_file,
+        filepath, scene_name,
+    ]
+    wall_start = time.perf_counter()
+    subprocess.run(command, check=True, stdout=subprocess.DEVNULL)
+    wall = time.perf_counter() - wall_start
+
+    with open(os.path.join(output_dir("profiles", quality), f"{output_file}.json"), "r", encoding="utf-8") as file:
+        profile = json.load(file)
+
+    rendered = [a for a in profile["animations"] if a["frames"]]
+    render_time = sum(a["wall"] for a in rendered)
+    frames = sum(a["frames"] for a in rendered)
+    return {
+        "fps": frames / render_time if render_time else 0.0,
+        "construct": profile["totals"]["construct"],
+        "wall": wall,
+        "peak_rss_mb": profile["peak_rss_mb"],
+        "frames": frames,
+    }
+
+def compare(results, baseline, threshold):
+    """Names and messages of every metric that got worse than baseline by more than threshold."""
+    regressions = []
+    for name, metrics in results.items():
+        if name not in baseline:
+            continue
+        for metric in LOWER_IS_BETTER + HIGHER_IS_BETTER:
+            old, new = baseline[name][metric], metrics[metric]
+            if not old:
+                continue
+            change = (new - old) / old
+            if metric in HIGHER_IS_BETTER:
+                change = -change
+            if change > threshold:
+                regressions.append(f"{name}.{metric}: {old:.3f} -> {new:.3f} ({change:+.1%} worse)")
+    return regressions
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark representative scene segments against a stored baseline.")
+    parser.add_argument("filepath", nargs="?", default="bh_scene.py")
+    parser.add_argument("-q", "--quality", default="l", help="manim quality flag (default: l, 480p15)")
+    parser.add_argument("--segments", nargs="+", choices=SEGMENTS, help="Only run these segments")
+    parser.add_argument("--baseline", default="benchmark_baseline.json")
+    parser.add_argument("--threshold", type=float, default=0.10,
+                        help="Allowed relative slowdown before a metric counts as a regression")
+    parser.add_argument("--save", action="store_true", help="Store this run as the new baseline")
+    args = parser.parse_args()
+
+    results = {}
+    for name in args.segments or SEGMENTS:
+        scene_name, start, end = SEGMENTS[name]
+        results[name] = run_segment(args.filepath, name, scene_name, start, end, args.quality)
+        metrics = results[name]
+        print(f"{name:<18} {metrics['fps']:7.1f} fps  construct {metrics['construct']:6.2f}s  "
+              f"wall {metrics['wall']:6.2f}s  peak {metrics['peak_rss_mb']:7.1f} MB")
+
+    if args.save or not os.path.exists(args.baseline):
+        with open(args.baseline, "w", encoding="utf-8") as file:
+            json.dump({"quality": args.quality, "segments": results}, file, indent=2)
+        print(f"Baseline written to {args.baseline}")
+        sys.exit()
+
+    with open(args.baseline, "r", encoding="utf-8") as file:
+        baseline = json.load(file)
+    if baseline["quality"] != args.quality:
+        sys.exit(f"Baseline was recorded at -q{baseline['quality']}, not -q{args.quality}.")
+
+    regressions = compare(results, baseline["segments"], args.threshold)
+    for regression in regressions:
+        print(f"REGRESSION {regression}")
+    if regressions:
+        sys.exit(1)
+    print(f"No regressions above {args.threshold:.0%} against {args.baseline}")
@@ -1,6 +1,15 @@
 from manim import *
 import numpy as np
 
+from cameras import CullingThreeDCamera, LatticeGroup, LatticeLine, SphereImpostor
+from coinflips import binomial_pmf
+from histogram import MacrostateHistogram, StreamHistogram
+from lattice import cached_warped_lattice
+from microstates import (
+    count_tex, log10_total_microstates, microstates, multiplicities, scientific_tex, window,
+)
+from preview import is_preview
+
 class PhysicalBlackHoleLattice(ThreeDScene):
     """
     An animation of a 3D spacetime lattice being warped by a central mass.
@@ -11,6 +20,10 @@ class PhysicalBlackHoleLattice(ThreeDScene):
     
     V5 (SYNCED): Timings adjusted to match narration from transcript.
     """
+    def __init__(self, **kwargs):
+        # Invisible and off-screen lattice lines are culled before depth sorting
+        super().__init__(camera_class=CullingThreeDCamera, **kwargs)
+
     def construct(self):
         # 1. --- CONFIGURATION ---
         
@@ -25,60 +38,55 @@ class PhysicalBlackHoleLattice(ThreeDScene):
         OUTER_COLOR = BLUE_D
         STROKE_WIDTH = 1.5
 
+        # Lines are sampled densely, then thinned wherever they are nearly
+        # straight, keeping every line within half a pixel of the true curve
+        LINE_SAMPLES = 401
+        PIXEL_TOLERANCE = 0.5
+        if is_preview():
+            # Draft renders only need the shape of the lattice
+            LINE_SAMPLES = 101
+            PIXEL_TOLERANCE = 2.0
+
+        # Outer lines fade to nothing; below this opacity they are not built at all
+        MIN_LINE_OPACITY = 0.02
+
         # 2. --- SCENE SETUP ---
         self.set_camera_orientation(phi=70 * DEGREES, theta=-120 * DEGREES, zoom=0.6)
         self.camera.light_source.move_to([-10, -10, 20])
 
         # 3. --- CORE LOGIC: THE PHYSICAL WARP FUNCTION ---
-        
-        def warp_space_physical(point):
-            r = np.linalg.norm(point)
-            if r == 0:
-                return point
-            if r < SCHWARZSCHILD_RADIUS:
-                return point * (SCHWARZSCHILD_RADIUS / r)
-
-            warp_factor = 1 - np.sqrt(1 - SCHWARZSCHILD_RADIUS / r)
-            displacement = WARP_AMPLITUDE * warp_factor
-            new_radius = r - displacement
-            new_radius = max(SCHWARZSCHILD_RADIUS, new_radius)
-            
-            return point * (new_radius / r)
-            
+        # The warp itself lives in lattice.warp_points and is evaluated on
+        # every sample point of every line in one batched NumPy call.
+
         # 4. --- OBJECT CREATION ---
 
-        black_hole = Sphere(
+        # A camera-facing disk instead of a 48x48 Sphere: same black silhouette,
+        # one shape to sort and draw per frame instead of 2,304 faces
+        black_hole = SphereImpostor(
             radius=SCHWARZSCHILD_RADIUS, resolution=(48, 48), color=BLACK
         )
 
         print("Constructing physically warped lattice...")
-        grid = VGroup()
-        coords = np.arange(-GRID_BOUNDS, GRID_BOUNDS + GRID_STEP, GRID_STEP)
-        
-        def add_colored_warped_line(start, end, vgroup):
-            flat_midpoint = interpolate(start, end, 0.5)
-            warped_midpoint = warp_space_physical(flat_midpoint)
-            distance = np.linalg.norm(warped_midpoint)
-            
-            alpha = min(1, distance / (GRID_BOUNDS * 1.2))
-            line_color = interpolate_color(INNER_COLOR, OUTER_COLOR, alpha)
-            line_opacity = 1 - (alpha**2)
-
-            line = ParametricFunction(
-                lambda t: warp_space_physical(interpolate(start, end, t)),
-                t_range=[0, 1],
-                color=line_color,
+        # Loaded from media/lattice_cache when the parameters are unchanged
+        points, rgbs, opacities = cached_warped_lattice(
+            SCHWARZSCHILD_RADIUS, GRID_BOUNDS, GRID_STEP, WARP_AMPLITUDE,
+            color_to_rgb(INNER_COLOR), color_to_rgb(OUTER_COLOR),
+            samples=LINE_SAMPLES,
+            tolerance=PIXEL_TOLERANCE * config.frame_width / config.pixel_width
+        )
+
+        # Drawn by the camera from cached arrays, projected once per frame
+        grid = LatticeGroup()
+        for line_points, rgb, opacity in zip(points, rgbs, opacities):
+            if opacity < MIN_LINE_OPACITY:
+                continue
+            line = LatticeLine(
+                color=rgb_to_color(rgb),
                 stroke_width=STROKE_WIDTH,
-                stroke_opacity=line_opacity
+                stroke_opacity=opacity
             )
-            vgroup.add(line)
-
-        # Generate lines
-        for i in coords:
-            for j in coords:
-                add_colored_warped_line(np.array([i, j, -GRID_BOUNDS]), np.array([i, j, GRID_BOUNDS]), grid)
-                add_colored_warped_line(np.array([i, -GRID_BOUNDS, j]), np.array([i, GRID_BOUNDS, j]), grid)
-                add_colored_warped_line(np.array([-GRID_BOUNDS, i, j]), np.array([GRID_BOUNDS, i, j]), grid)
+            line.set_points_smoothly(line_points)
+            grid.add(line)
 
         print("Lattice construction complete.")
         
@@ -176,6 +184,8 @@ class PhysicalBlackHoleLattice(ThreeDScene):
 
 class WhatIsEntropy(Scene):
     def glow_effect(self, mobject, color=TEAL, layers=5, radius=0.08, opacity_step=0.15):
+        if is_preview():
+            layers = min(layers, 2)
         glows = VGroup()
         for i in range(layers):
             glow = mobject.copy()
@@ -217,28 +227,30 @@ class WhatIsEntropy(Scene):
 
         # STEP 3: Glow fade in
         glow = self.glow_effect(entropy_only, color=TEAL)
-        self.play(LaggedStart(*[FadeIn(layer) for layer in glow], lag_ratio=0.1))
+        # run_time pinned to the 5-layer length so preview's fewer layers keep the timing
+        self.play(LaggedStart(*[FadeIn(layer) for layer in glow], lag_ratio=0.1), run_time=1.4)
         self.wait(0.6)
 
         # STEP 4: Glow fade out
-        self.play(LaggedStart(*[FadeOut(layer) for layer in glow], lag_ratio=0.05))
+        self.play(LaggedStart(*[FadeOut(layer) for layer in glow], lag_ratio=0.05), run_time=1.2)
 
         # STEP 5: Move Entropy to top
         self.play(entropy_only.animate.to_edge(UP))
         self.wait(6)
 
         # STEP 5: Show the coin microstates as a table
-        headers = ["Penny", "Nickel", "Dime"]
-        rows = [
-            ["H", "H", "H"],
-            ["H", "H", "T"],
-            ["H", "T", "H"],
-            ["T", "H", "H"],
-            ["H", "T", "T"],
-            ["T", "H", "T"],
-            ["T", "T", "H"],
-            ["T", "T", "T"],
-        ]
+        # Only the first MAX_TABLE_ROWS microstates (and MAX_MACROSTATE_ROWS
+        # macrostates) are built; larger systems end in a row of dots
+        NUM_COINS = 3
+        LARGE_NUM_COINS = 100
+        MAX_TABLE_ROWS = 8
+        MAX_MACROSTATE_ROWS = 6
+
+        if NUM_COINS <= 3:
+            headers = ["Penny", "Nickel", "Dime"][:NUM_COINS]
+        else:
+            headers = [f"#{i + 1}" for i in range(NUM_COINS)]
+        rows = window(microstates(NUM_COINS), 0, MAX_TABLE_ROWS)
 
         table = VGroup()
         header_row = VGroup(*[Text(h, font_size=30).set_color(YELLOW) for h in headers]).arrange(RIGHT, buff=0.8)
@@ -256,7 +268,11 @@ class WhatIsEntropy(Scene):
                     colored_cells.append(Text(cell, font_size=30))
             row = VGroup(*colored_cells).arrange(RIGHT, buff=1.5)
             table.add(row)
+        if 2**NUM_COINS > len(rows):
+            table.add(MathTex(r"\vdots", font_size=30))
         table.arrange(DOWN, buff=0.4)
+        if table.width > config.frame_width / 2:
+            table.scale_to_fit_width(config.frame_width / 2)
         table.move_to(ORIGIN)
 
         self.play(FadeOut(entropy_only), run_time=1)
@@ -274,19 +290,21 @@ class WhatIsEntropy(Scene):
         self.wait(0.5)
 
         # STEP 7: Show multiplicities on the right
-        getting_eqs = VGroup(
-            MathTex(r"\text{getting }", "3", r"\text{ heads}", r"=1", r"\text{ way}"),
-            MathTex(r"\text{getting }", "2", r"\text{ heads}", r"=3", r"\text{ ways}"),
-            MathTex(r"\text{getting }", "1", r"\text{ heads}", r"=3", r"\text{ ways}"),
-            MathTex(r"\text{getting }", "0", r"\text{ heads}", r"=1", r"\text{ way}")
-        ).arrange(DOWN, aligned_edge=LEFT, buff=0.5).to_edge(RIGHT, buff=2)
-
-        omega_eqs = VGroup(
-            MathTex(r"\Omega", r"(3\text{ heads}) = 1"),
-            MathTex(r"\Omega(2\text{ heads}) = 3"),
-            MathTex(r"\Omega(1\text{ heads})  = 3"),
-            MathTex(r"\Omega(0\text{ heads}) = 1"),
-        ).arrange(DOWN, aligned_edge=LEFT, buff=0.5).to_edge(RIGHT, buff=3)
+        macrostates = multiplicities(NUM_COINS)[:MAX_MACROSTATE_ROWS]
+        getting_eqs = VGroup(*[
+            MathTex(r"\text{getting }", str(heads), r"\text{ heads}", rf"={count_tex(count)}",
+                    r"\text{ way}" if count == 1 else r"\text{ ways}")
+            for heads, count in macrostates
+        ])
+        omega_eqs = VGroup(*[
+            MathTex(r"\Omega", rf"({heads}\text{{ heads}}) = {count_tex(count)}")
+            for heads, count in macrostates
+        ])
+        if NUM_COINS + 1 > len(macrostates):
+            getting_eqs.add(MathTex(r"\vdots"))
+            omega_eqs.add(MathTex(r"\vdots"))
+        getting_eqs.arrange(DOWN, aligned_edge=LEFT, buff=0.5).to_edge(RIGHT, buff=2)
+        omega_eqs.arrange(DOWN, aligned_edge=LEFT, buff=0.5).to_edge(RIGHT, buff=3)
 
         self.play(LaggedStartMap(FadeIn, getting_eqs, lag_ratio=0.3), run_time=3)
         self.wait(2)
@@ -322,7 +340,7 @@ class WhatIsEntropy(Scene):
         self.wait(2)
     
         # --- Step 2: Flash rectangles quickly around other microstate rows ---
-        for i in range(2, len(table)):
+        for i in range(2, len(rows) + 1):
             rect = SurroundingRectangle(table[i], color=ORANGE, buff=0.15)
             self.play(FadeIn(rect), run_time=0.4)
             self.play(FadeOut(rect), run_time=0.4)
@@ -345,7 +363,7 @@ class WhatIsEntropy(Scene):
         self.wait(2)
 
         # --- Step 5: Flash rectangles around other macrostates quickly ---
-        for i in range(1, len(omega_eqs)):
+        for i in range(1, len(macrostates)):
             rect = SurroundingRectangle(omega_eqs[i], color=PURPLE, buff=0.15)
             self.play(FadeIn(rect), run_time=0.4)
             self.play(FadeOut(rect), run_time=0.4)
@@ -365,26 +383,26 @@ class WhatIsEntropy(Scene):
         self.wait(21)
 
         # --- STEP 8: Show explosion of microstates for larger system ---
-        large_system_title = MathTex(r"\text{Now Imagine }100\text{ Coins...}", font_size=40).to_edge(UP)
+        large_system_title = MathTex(rf"\text{{Now Imagine }}{LARGE_NUM_COINS}\text{{ Coins...}}", font_size=40).to_edge(UP)
 
         # Right side (microstates info)
-        micro_expr = MathTex(r"2^{100}", font_size=44)
+        micro_expr = MathTex(rf"2^{{{LARGE_NUM_COINS}}}", font_size=44)
         micro_label = Text("microstates", font_size=28)
         micro_group = VGroup(micro_expr, micro_label).arrange(DOWN, buff=0.3).move_to(RIGHT * 3)
 
         # Left side (macrostates info)
-        macro_expr = Tex(r"101", font_size=40)
+        macro_expr = Tex(str(LARGE_NUM_COINS + 1), font_size=40)
         macro_label = Text("macrostates", font_size=28)
         macro_group = VGroup(macro_expr, macro_label).arrange(DOWN, buff=0.3).move_to(LEFT * 3)
 
         # Below macro_group: the range 0,1,2,...,100
-        macro_mult = MathTex(r"0,\,1,\,2,\,\ldots,\,100", font_size=26).next_to(macro_group, DOWN, buff=0.3)
+        macro_mult = MathTex(rf"0,\,1,\,2,\,\ldots,\,{LARGE_NUM_COINS}", font_size=26).next_to(macro_group, DOWN, buff=0.3)
 
         # Below micro_group: something like 2 \times 2 \times ... (to indicate exponential)
         micro_range = MathTex(r"2 \times 2 \times \cdots \times 2", font_size=26).next_to(micro_group, DOWN, buff=0.3)
 
         # Replacement for micro_expr (approximation)
-        micro_approx = MathTex(r"\approx 1.27 \times 10^{30}", font_size=44).move_to(micro_expr.get_center())
+        micro_approx = MathTex(rf"\approx {scientific_tex(log10_total_microstates(LARGE_NUM_COINS))}", font_size=44).move_to(micro_expr.get_center())
 
         # Animation
         self.play(FadeOut(table), FadeOut(omega_eqs), FadeOut(macrostates_vertical), FadeOut(microstates_vertical))
@@ -399,7 +417,16 @@ class WhatIsEntropy(Scene):
 
         # Transform 2^100 into the approximation
         self.play(Transform(micro_expr, micro_approx))
-        self.wait(10)
+
+        # Simulated throws of the 100 coins pile up around 50 heads, along the binomial
+        # (FadeIn, stream and wait together take the 10 seconds this step always had)
+        TRIALS = 200_000 if is_preview() else 2_000_000
+        CHUNK_SIZE = TRIALS // 40
+        histogram = MacrostateHistogram(binomial_pmf(LARGE_NUM_COINS), width=5, height=1.4)
+        histogram.move_to(DOWN * 2.6)
+        self.play(FadeIn(histogram), run_time=1)
+        self.play(StreamHistogram(histogram, LARGE_NUM_COINS, TRIALS, chunk_size=CHUNK_SIZE), run_time=8)
+        self.wait(1)
 
 
         # --- STEP 9: Show motivation for logarithm ---
@@ -412,6 +439,7 @@ class WhatIsEntropy(Scene):
             FadeOut(large_system_title, shift=UP),
             FadeOut(micro_group, micro_range, shift=RIGHT),
             FadeOut(macro_group, macro_mult, shift=LEFT),
+            FadeOut(histogram, shift=DOWN),
             FadeIn(too_big)
         )
         self.wait(15)
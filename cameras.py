@@ -0,0 +1,338 @@
+import weakref
+
+import numpy as np
+
+from manim import BLACK, Camera, Circle, ThreeDCamera, VGroup, VMobject
+
+class SphereImpostor(Circle):
+    """
+    Drop-in stand-in for a uniformly coloured Sphere: a single filled disk in
+    the xy-plane that CullingThreeDCamera always draws facing the camera, with
+    the radius a sphere of the same size would have on screen. It is depth
+    sorted by its centre among shaded 3D mobjects, and lattice lines behind its
+    centre are drawn before it and the rest after it, so the horizon occludes
+    the lattice correctly. Other unshaded mobjects are drawn over it, as
+    ThreeDCamera does for every unshaded mobject.
+    """
+    def __init__(self, radius=1, color=BLACK, resolution=None, **kwargs):
+        # resolution is accepted (and unused) so Sphere(...) calls can be swapped over unchanged
+        super().__init__(radius=radius, fill_color=color, fill_opacity=1, stroke_width=0, **kwargs)
+
+class LatticeLine(VMobject):
+    """
+    Stroked line of a LatticeGroup. Every attribute assignment (points, stroke
+    colours and width, including augmented ones like points -= ...) and every
+    in-place colour update marks the group's cached arrays stale. The group is
+    held through a weak reference, which copy() shares instead of deep copying
+    the whole lattice.
+    """
+    def get_lattice(self):
+        ref = self.__dict__.get("lattice_ref")
+        return ref() if ref is not None else None
+
+    def mark_lattice_stale(self):
+        lattice = self.get_lattice()
+        if lattice is not None:
+            lattice.stale = True
+
+    def __setattr__(self, name, value):
+        super().__setattr__(name, value)
+        if name not in ("lattice_ref", "lattice_index"):
+            self.mark_lattice_stale()
+
+    def update_rgbas_array(self, *args, **kwargs):
+        super().update_rgbas_array(*args, **kwargs)
+        self.mark_lattice_stale()
+        return self
+
+class LatticeGroup(VGroup):
+    """
+    VGroup of single-colour LatticeLines that CullingThreeDCamera draws as a
+    batch. The group keeps the points of all lines in one contiguous array,
+    with per-line start, count, stroke rgba, width and mean point arrays,
+    rebuilt only after a line changed. Each frame they are projected with one
+    matrix multiply, culled with array operations and stroked one colour/width
+    run at a time, instead of going through the per-mobject pipeline.
+    Animations still see ordinary submobjects, so Create(lag_ratio=...),
+    FadeOut etc. behave as before.
+    """
+    def __init__(self, *lines, **kwargs):
+        self.stale = True
+        super().__init__(*lines, **kwargs)
+
+    def __setattr__(self, name, value):
+        super().__setattr__(name, value)
+        if name == "submobjects":
+            super().__setattr__("stale", True)
+
+    def add(self, *lines):
+        for line in lines:
+            if not isinstance(line, LatticeLine):
+                raise TypeError(f"LatticeGroup only holds LatticeLines, not {type(line).__name__}")
+        super().add(*lines)
+        for line in lines:
+            line.lattice_ref = weakref.ref(self)
+        return self
+
+    def remove(self, *lines):
+        super().remove(*lines)
+        for line in lines:
+            if line.get_lattice() is self:
+                line.lattice_ref = None
+        # Mobject.remove edits submobjects in place
+        self.stale = True
+        return self
+
+    def line_index(self, line):
+        """Index of line in the cached arrays, or None for a copy of a line of this lattice."""
+        self.lattice_arrays()
+        index = line.__dict__.get("lattice_index")
+        if index is None or index >= len(self.submobjects) or self.submobjects[index] is not line:
+            return None
+        return index
+
+    def lattice_arrays(self):
+        """Rebuilds the concatenated arrays if any line changed since the last call."""
+        if not self.stale:
+            return self
+        lines = self.submobjects
+        for index, line in enumerate(lines):
+            line.lattice_index = index
+        counts = np.array([len(line.points) for line in lines], dtype=int)
+        starts = np.concatenate([[0], np.cumsum(counts)[:-1]]).astype(int)
+        points = np.concatenate([line.points for line in lines]) if counts.sum() else np.zeros((0, 3))
+
+        means = np.full((len(lines), 3), np.nan)
+        nonempty = counts > 0
+        if nonempty.any():
+            # Empty lines add no points, so consecutive non-empty starts delimit each line exactly
+            means[nonempty] = np.add.reduceat(points, starts[nonempty]) / counts[nonempty, None]
+
+        self.line_points = points
+        self.line_counts = counts
+        self.line_starts = starts
+        self.line_rgbas = np.array([line.get_stroke_rgbas()[0] for line in lines]).reshape(-1, 4)
+        self.line_widths = np.array([line.get_stroke_width() for line in lines], dtype=float)
+        self.line_means = means
+        self.stale = False
+        return self
+
+class LatticeBatch:
+    """Indices of the lines of a LatticeGroup to draw at one position in the display order."""
+    def __init__(self, group, indices):
+        self.group = group
+        self.indices = indices
+
+class CullingThreeDCamera(ThreeDCamera):
+    """
+    ThreeDCamera that skips mobjects which cannot contribute to the frame
+    before they are depth-sorted and drawn: fully transparent ones, and ones
+    whose projected bounding box lies entirely outside the frame. Mobjects
+    fixed in frame are always drawn. SphereImpostors are drawn as camera-facing
+    disks and LatticeGroups as single batched passes.
+    merge_lattice_runs=True strokes each run of same-coloured lattice lines as
+    one path, which is faster but composites overlapping semi-transparent
+    lines once instead of once per line, so the frames differ slightly.
+    """
+    def __init__(self, cull_margin=0.1, merge_lattice_runs=False, **kwargs):
+        self.cull_margin = cull_margin
+        self.merge_lattice_runs = merge_lattice_runs
+        super().__init__(**kwargs)
+        self.display_funcs = {LatticeBatch: self.display_lattice_batches, **self.display_funcs}
+
+    def type_or_raise(self, mobject):
+        if isinstance(mobject, LatticeBatch):
+            return LatticeBatch
+        return super().type_or_raise(mobject)
+
+    def is_invisible(self, mobject):
+        if mobject.get_num_points() == 0:
+            return True
+        stroke = mobject.get_stroke_opacities() if mobject.has_stroke() else np.zeros(1)
+        fill = mobject.get_fill_opacities()
+        return np.all(stroke == 0) and np.all(fill == 0)
+
+    def is_outside_frame(self, mobject):
+        points = mobject.points
+        low, high = points.min(axis=0), points.max(axis=0)
+        corners = np.array([
+            [x, y, z] for x in (low[0], high[0]) for y in (low[1], high[1]) for z in (low[2], high[2])
+        ])
+        projected = self.project_points(corners)
+        half_width = self.frame_width / 2 + self.cull_margin
+        half_height = self.frame_height / 2 + self.cull_margin
+        return (
+            projected[:, 0].max() < -half_width
+            or projected[:, 0].min() > half_width
+            or projected[:, 1].max() < -half_height
+            or projected[:, 1].min() > half_height
+        )
+
+    def project_impostor(self, mobject, points):
+        center = mobject.get_center()
+        offsets = points - center
+        radius = np.linalg.norm(offsets, axis=1).max()
+
+        # On-screen radius: project a point one radius away along the screen's x axis
+        right = self.get_rotation_matrix()[0]
+        projected_center, projected_edge = self.project_points(np.array([center, center + radius * right]))
+        scale = np.linalg.norm(projected_edge - projected_center) / radius
+
+        projected = projected_center + offsets * scale
+        projected[:, 2] = projected_center[2]
+        return projected
+
+    def transform_points_pre_display(self, mobject, points):
+        if isinstance(mobject, SphereImpostor) and len(points) > 0:
+            return self.project_impostor(mobject, points)
+        return super().transform_points_pre_display(mobject, points)
+
+    def lattice_index(self, mobject):
+        """(lattice, index) of a line drawn in a lattice batch, or (None, None)."""
+        lattice = mobject.get_lattice() if isinstance(mobject, LatticeLine) else None
+        index = lattice.line_index(mobject) if lattice is not None else None
+        return (lattice, index) if index is not None else (None, None)
+
+    def get_mobjects_to_display(self, mobjects, include_submobjects=True, excluded_mobjects=None):
+        # Flatten the families without ThreeDCamera's depth sort, cull, then sort only what is left
+        family = Camera.get_mobjects_to_display(self, mobjects, include_submobjects, excluded_mobjects)
+        fixed = self.fixed_in_frame_mobjects | self.fixed_orientation_mobjects.keys()
+        kept = [
+            mob for mob in family
+            if mob in fixed
+            or not isinstance(mob, VMobject)
+            # Lattice lines are culled later, all at once, from the lattice's cached arrays
+            or self.lattice_index(mob)[0] is not None
+            or not (self.is_invisible(mob) or self.is_outside_frame(mob))
+        ]
+        displayed = self.place_impostors(super().get_mobjects_to_display(kept, include_submobjects=False))
+
+        # Runs of lines of one lattice become one batch
+        result = []
+        for mob in displayed:
+            lattice, index = self.lattice_index(mob)
+            if lattice is None:
+                result.append(mob)
+            elif result and isinstance(result[-1], LatticeBatch) and result[-1].group is lattice:
+                result[-1].indices.append(index)
+            else:
+                result.append(LatticeBatch(lattice, [index]))
+        return self.interleave_impostors(result)
+
+    def place_impostors(self, mobjects):
+        """
+        ThreeDCamera only depth sorts mobjects with shade_in_3d and draws the
+        rest (impostors included) afterwards. Each impostor is moved to where a
+        shaded mobject at its centre would be sorted: after the shaded mobjects
+        farther from the camera, before the nearer ones and the unshaded ones.
+        """
+        impostors = [mob for mob in mobjects if isinstance(mob, SphereImpostor)]
+        if not impostors:
+            return mobjects
+        camera_axis = self.get_rotation_matrix()[2]
+        result = [mob for mob in mobjects if not isinstance(mob, SphereImpostor)]
+        for impostor in impostors:
+            depth = impostor.get_center() @ camera_axis
+            index = next((
+                i for i, mob in enumerate(result)
+                if not getattr(mob, "shade_in_3d", False)
+                or mob.get_z_index_reference_point() @ camera_axis > depth
+            ), len(result))
+            result.insert(index, impostor)
+        return result
+
+    def interleave_impostors(self, mobjects):
+        """
+        Moves each SphereImpostor into the lattice batch drawn after it: lines
+        whose mean point is farther from the camera than the impostor's centre
+        are drawn first, then the impostor, then the nearer lines.
+        """
+        impostors = [mob for mob in mobjects if isinstance(mob, SphereImpostor)]
+        if not impostors or not any(isinstance(mob, LatticeBatch) for mob in mobjects):
+            return mobjects
+
+        camera_axis = self.get_rotation_matrix()[2]
+        result = []
+        for mob in mobjects:
+            if isinstance(mob, SphereImpostor):
+                continue
+            if not isinstance(mob, LatticeBatch):
+                result.append(mob)
+                continue
+            indices = np.asarray(mob.indices, dtype=int)
+            # Empty lines have a NaN mean and count as in front
+            depths = mob.group.line_means[indices] @ camera_axis
+            for impostor in sorted(impostors, key=lambda imp: imp.get_center() @ camera_axis):
+                behind = depths < impostor.get_center() @ camera_axis
+                result.append(LatticeBatch(mob.group, indices[behind]))
+                result.append(impostor)
+                indices, depths = indices[~behind], depths[~behind]
+            result.append(LatticeBatch(mob.group, indices))
+            impostors = []
+        # Impostors with no lattice after them keep their place at the end
+        return result + impostors
+
+    def project_lattice(self, group):
+        """Projected points and projected per-line bounds of every line of group."""
+        projected = self.project_points(group.line_points) if len(group.line_points) else np.zeros((0, 3))
+        low = np.full((len(group.line_counts), 2), np.inf)
+        high = np.full((len(group.line_counts), 2), -np.inf)
+        nonempty = group.line_counts > 0
+        if nonempty.any():
+            starts = group.line_starts[nonempty]
+            low[nonempty] = np.minimum.reduceat(projected[:, :2], starts)
+            high[nonempty] = np.maximum.reduceat(projected[:, :2], starts)
+        return projected, low, high
+
+    def display_lattice_batches(self, batches, pixel_array):
+        """
+        Strokes the visible lines of each batch from the cached projection,
+        setting the source colour and width once per run of consecutive lines
+        that share them. Each line is stroked on its own, as the per-mobject
+        pipeline does, unless merge_lattice_runs is set.
+        """
+        ctx = self.get_cairo_context(pixel_array)
+        half_size = np.array([self.frame_width, self.frame_height]) / 2 + self.cull_margin
+        projections = {}
+        for batch in batches:
+            group = batch.group
+            indices = np.asarray(batch.indices, dtype=int)
+            if not len(indices):
+                continue
+            if id(group) not in projections:
+                projections[id(group)] = self.project_lattice(group)
+            projected, low, high = projections[id(group)]
+
+            # Cull empty, zero-width and fully transparent lines, and lines entirely outside the frame
+            rgbas = group.line_rgbas[indices]
+            widths = group.line_widths[indices]
+            visible = (
+                (group.line_counts[indices] > 0)
+                & (widths > 0)
+                & (rgbas[:, 3] > 0)
+                & np.all(high[indices] >= -half_size, axis=1)
+                & np.all(low[indices] <= half_size, axis=1)
+            )
+            indices, rgbas, widths = indices[visible], rgbas[visible], widths[visible]
+            if not len(indices):
+                continue
+
+            style = np.column_stack([rgbas, widths])
+            run_starts = np.flatnonzero(np.concatenate([[True], np.any(style[1:] != style[:-1], axis=1)]))
+            run_ends = np.append(run_starts[1:], len(indices))
+            for run_start, run_end in zip(run_starts, run_ends):
+                rgba = rgbas[run_start]
+                # The ARGB32 surface stores BGR, as in Camera.set_cairo_context_color
+                ctx.set_source_rgba(*rgba[2::-1], rgba[3])
+                ctx.set_line_width(widths[run_start] * self.cairo_line_width_multiple)
+                ctx.new_path()
+                for index in indices[run_start:run_end]:
+                    start = group.line_starts[index]
+                    curves = projected[start:start + group.line_counts[index], :2].reshape(-1, 4, 2).tolist()
+                    ctx.move_to(*curves[0][0])
+                    for _, handle1, handle2, anchor in curves:
+                        ctx.curve_to(*handle1, *handle2, *anchor)
+                    if not self.merge_lattice_runs:
+                        ctx.stroke()
+                if self.merge_lattice_runs:
+                    ctx.stroke()
@@ -0,0 +1,46 @@
+import numpy as np
+
+from microstates import multiplicity
+
+# Set bits in every byte value, for numpy versions without np.bitwise_count
+POPCOUNT_TABLE = np.unpackbits(np.arange(256, dtype=np.uint8)[:, None], axis=1).sum(axis=1).astype(np.uint8)
+
+def popcount(words):
+    """Set bits in each row of a 2D uint64 array."""
+    if hasattr(np, "bitwise_count"):
+        return np.bitwise_count(words).sum(axis=1, dtype=np.int64)
+    return POPCOUNT_TABLE[words.view(np.uint8)].sum(axis=1, dtype=np.int64)
+
+def flip_coins(rng, num_coins, trials):
+    """
+    Number of heads in each of trials throws of num_coins fair coins. Every
+    throw is packed into ceil(num_coins / 64) random words, one bit per coin,
+    so no per-coin or per-trial Python objects are created.
+    """
+    num_words = -(-num_coins // 64)
+    words = rng.bit_generator.random_raw((trials, num_words)).astype(np.uint64, copy=False)
+    spare_bits = num_words * 64 - num_coins
+    if spare_bits:
+        words[:, -1] &= np.uint64((1 << (64 - spare_bits)) - 1)
+    return popcount(words)
+
+def stream_macrostate_counts(num_coins, trials, chunk_size=1 << 16, seed=0):
+    """
+    Yields the running count of throws per number of heads (index 0..num_coins)
+    after each chunk of chunk_size throws, trials throws in total. The array
+    is updated in place; copy it to keep a snapshot. A fixed seed keeps the
+    frames, and so manim's cache, reproducible.
+    """
+    rng = np.random.default_rng(seed)
+    counts = np.zeros(num_coins + 1, dtype=np.int64)
+    done = 0
+    while done < trials:
+        size = min(chunk_size, trials - done)
+        counts += np.bincount(flip_coins(rng, num_coins, size), minlength=num_coins + 1)
+        done += size
+        yield counts
+
+def binomial_pmf(num_coins):
+    """Exact probability of each number of heads, from the big-integer multiplicities."""
+    total = 2**num_coins
+    return np.array([multiplicity(num_coins, heads) / total for heads in range(num_coins + 1)])
@@ -1,4 +1,28 @@
+import argparse
 import ast
+import hashlib
+import json
+import os
+import re
+import subprocess
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from preview import PREVIEW_MEDIA_DIR, PREVIEW_QUALITY_DIR
+from tex_prewarm import prewarm
+
+# manim quality flag -> output folder name under media/videos/<module>/
+QUALITY_DIRS = {
+    "l": "480p15",
+    "m": "720p30",
+    "h": "1080p60",
+    "p": "1440p60",
+    "k": "2160p60",
+}
+
+# Renders a single scene with the optional render modes (static holds, ...)
+RENDER_SCRIPT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "render.py")
 
 def extract_class_names(filepath):
     with open(filepath, "r", encoding="utf-8") as file:
@@ -15,19 +39,417 @@ def extract_class_names(filepath):
     class_names.sort(key=lambda x: x[0])
     return [name for _, name in class_names]
 
-# Example usage
-if __name__ == "__main__":
-    filepath = "bh_scene.py"  # Replace with your target file
-    classes = extract_class_names(filepath)
-    # write it as "file name, class name" in a txt file in the media\videos\bh_scene\1080p60
-    path = r"media/videos/bh_scene/1080p60/inputs.txt"
+def manim_version():
+    try:
+        from importlib.metadata import PackageNotFoundError, version
+        return version("manim")
+    except PackageNotFoundError:
+        return "unknown"
+
+def local_imports(tree, directory):
+    """Paths of the modules next to the scene file that it imports (e.g. lattice.py)."""
+    paths = []
+    for node in tree.body:
+        if isinstance(node, ast.ImportFrom) and node.module:
+            names = [node.module]
+        elif isinstance(node, ast.Import):
+            names = [alias.name for alias in node.names]
+        else:
+            continue
+        for name in names:
+            path = os.path.join(directory, name.replace(".", os.sep) + ".py")
+            if os.path.exists(path):
+                paths.append(path)
+    return sorted(paths)
+
+def local_dependencies(paths, exclude=()):
+    """
+    Every local module reachable from the modules at paths through local
+    imports, following imports of imports. Modules in exclude are neither
+    returned nor followed.
+    """
+    exclude = {os.path.abspath(path) for path in exclude}
+    found = set()
+    queue = [os.path.abspath(path) for path in paths]
+    while queue:
+        path = queue.pop()
+        with open(path, "r", encoding="utf-8") as file:
+            tree = ast.parse(file.read(), filename=path)
+        for dependency in local_imports(tree, os.path.dirname(path)):
+            dependency = os.path.abspath(dependency)
+            if dependency not in found and dependency not in exclude:
+                found.add(dependency)
+                queue.append(dependency)
+    return found
+
+def scene_hashes(filepath, render_config):
+    """
+    Content hash for every scene class. Each hash covers the normalized AST of
+    the class (so comments and formatting don't count), the module-level code,
+    render.py (its render modes change the video), every local module either
+    of them imports directly or through other local modules, the render config
+    and the manim version.
+    """
+    with open(filepath, "r", encoding="utf-8") as file:
+        tree = ast.parse(file.read(), filename=filepath)
+
+    shared = hashlib.sha256()
+    shared.update(json.dumps(render_config, sort_keys=True).encode("utf-8"))
+    shared.update(manim_version().encode("utf-8"))
+    for node in tree.body:
+        if not isinstance(node, ast.ClassDef):
+            shared.update(ast.dump(node).encode("utf-8"))
+    with open(RENDER_SCRIPT, "r", encoding="utf-8") as file:
+        render_tree = ast.parse(file.read(), filename=RENDER_SCRIPT)
+    shared.update(ast.dump(render_tree).encode("utf-8"))
+    # The build driver itself (this file) doesn't change what a scene renders to
+    paths = local_dependencies([filepath, RENDER_SCRIPT], exclude=[filepath, RENDER_SCRIPT, __file__])
+    for path in sorted(paths):
+        with open(path, "r", encoding="utf-8") as file:
+            shared.update(ast.dump(ast.parse(file.read())).encode("utf-8"))
+
+    hashes = {}
+    for node in ast.walk(tree):
+        if isinstance(node, ast.ClassDef):
+            digest = shared.copy()
+            digest.update(ast.dump(node).encode("utf-8"))
+            hashes[node.name] = digest.hexdigest()
+    return hashes
+
+def load_manifest(path):
+    if not os.path.exists(path):
+        return {}
+    with open(path, "r", encoding="utf-8") as file:
+        return json.load(file)
+
+def save_manifest(path, manifest):
+    with open(path, "w", encoding="utf-8") as file:
+        json.dump(manifest, file, indent=2, sort_keys=True)
+
+def stale_scenes(scenes, hashes, manifest, out_dirs):
+    """Scenes whose hash changed since the last build, or whose MP4 is missing from any of out_dirs."""
+    return [
+        scene for scene in scenes
+        if manifest.get(scene) != hashes[scene]
+        or not all(os.path.exists(os.path.join(out_dir, f"{scene}.mp4")) for out_dir in out_dirs)
+    ]
+
+def output_dir(kind, quality, preview=False):
+    """
+    media/<kind>/<quality dir> for render by-products (checkpoints, profiles,
+    footprints), under media_preview for previews, so renders of one scene at
+    different qualities never read or delete each other's files.
+    """
+    if preview:
+        return os.path.join(PREVIEW_MEDIA_DIR, kind, PREVIEW_QUALITY_DIR)
+    return os.path.join("media", kind, QUALITY_DIRS[quality])
+
+def video_dir(filepath, quality, preview=False):
+    module = os.path.splitext(os.path.basename(filepath))[0]
+    if preview:
+        return os.path.join(PREVIEW_MEDIA_DIR, "videos", module, PREVIEW_QUALITY_DIR)
+    return os.path.join("media", "videos", module, QUALITY_DIRS[quality])
+
+def render_scene(filepath, scene_name, quality, render_flags=(), label=None):
+    """
+    Renders one scene (or one slice of it) in a render.py subprocess. Progress
+    lines from manim are echoed with the label in front, so interleaved output
+    from several workers stays readable. Returns (label, exit_code, wall_time).
+    """
+    label = label or scene_name
+    command = [sys.executable, RENDER_SCRIPT, f"-q{quality}", *render_flags, filepath, scene_name]
+    start = time.perf_counter()
+    print(f"[{label}] started: {' '.join(command)}", flush=True)
+
+    process = subprocess.Popen(
+        command, stdout=subprocess.PIPE, stderr=subprocess.STDOUT, text=True, bufsize=1
+    )
+    for line in process.stdout:
+        # manim reports each finished animation ("Animation 12 : Partial movie file written ...")
+        if re.search(r"Animation \d+", line):
+            elapsed = time.perf_counter() - start
+            print(f"[{label}] {elapsed:7.1f}s  {line.strip()}", flush=True)
+    exit_code = process.wait()
+
+    wall_time = time.perf_counter() - start
+    status = "ok" if exit_code == 0 else f"FAILED (exit {exit_code})"
+    print(f"[{label}] finished in {wall_time:.1f}s: {status}", flush=True)
+    return label, exit_code, wall_time
+
+def scene_slices(filepath, scene_name, num_slices):
+    """
+    Contiguous animation ranges for rendering one scene on several workers,
+    balanced by run time. The timings come from a render.py --durations pass,
+    which runs construct without drawing frames.
+    """
+    command = [sys.executable, RENDER_SCRIPT, "--durations", filepath, scene_name]
+    output = subprocess.run(command, capture_output=True, text=True, check=True).stdout
+    # The JSON list is the last thing printed, after manim's own log lines
+    durations = json.loads(output.strip().splitlines()[-1])
 
-    # file 'class name'
+    from render import split_animations
+    return split_animations(durations, num_slices)
 
+def stitch_slices(out_dir, scene_name, num_slices):
+    """Losslessly joins the slice videos of a scene back into <scene>.mp4."""
+    slice_names = [f"{scene_name}_slice{k}" for k in range(num_slices)]
+    inputs_path = os.path.join(out_dir, f"{scene_name}_slices.txt")
+    write_inputs([f"{name}.mp4" for name in slice_names], inputs_path)
+
+    try:
+        assemble(inputs_path, os.path.join(out_dir, f"{scene_name}.mp4"))
+    except subprocess.CalledProcessError as error:
+        print(f"[{scene_name}] ffmpeg failed to join the slices:\n{error.stderr}", flush=True)
+        return error.returncode
+    for name in slice_names:
+        os.remove(os.path.join(out_dir, f"{name}.mp4"))
+    os.remove(inputs_path)
+    return 0
+
+def render_all(filepath, scenes, quality, workers, render_flags=(), slices=None):
+    """
+    Renders the scenes in a process pool; the build takes as long as the
+    slowest job. Scenes listed in slices ({scene: N}) are split into N
+    animation ranges that render as separate jobs and are stitched afterwards.
+    Returns {scene: (exit_code, wall_time)}.
+    """
+    slices = slices or {}
+    jobs = []
+    for scene in scenes:
+        if slices.get(scene, 1) > 1:
+            for k, (start, end) in enumerate(scene_slices(filepath, scene, slices[scene])):
+                flags = [*render_flags, "--animations", str(start), str(end), "--output-file", f"{scene}_slice{k}"]
+                jobs.append((scene, flags, f"{scene}[{start}-{end}]"))
+        else:
+            jobs.append((scene, list(render_flags), scene))
+
+    job_results = {}
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = {
+            pool.submit(render_scene, filepath, scene, quality, flags, label): scene
+            for scene, flags, label in jobs
+        }
+        for future in as_completed(futures):
+            _, exit_code, wall_time = future.result()
+            job_results.setdefault(futures[future], []).append((exit_code, wall_time))
+
+    # A scene failed if any of its jobs failed; slices ran side by side, so
+    # the scene took as long as its slowest slice
+    results = {}
+    out_dir = video_dir(filepath, quality, "--preview" in render_flags)
+    for scene, scene_jobs in job_results.items():
+        exit_code = max((code for code, _ in scene_jobs), key=abs)
+        if exit_code == 0 and len(scene_jobs) > 1:
+            exit_code = stitch_slices(out_dir, scene, len(scene_jobs))
+        results[scene] = (exit_code, max(wall for _, wall in scene_jobs))
+    return results
+
+def write_inputs(filenames, path):
+    # file 'class name.mp4'
     with open(path, "w", encoding="utf-8") as file:
         file.truncate(0)
-        for class_name in classes:
-            file.write(f"file '{class_name}.mp4'\n")
-            print(f"file '{class_name}.mp4'")
+        for filename in filenames:
+            file.write(f"file '{filename}'\n")
+            print(f"file '{filename}'")
+
+def assemble(inputs_path, output_path, narration=None):
+    """
+    Concatenates the videos listed in inputs_path into output_path with stream
+    copy, optionally muxing in a narration track (copied if it is already AAC).
+    Raises CalledProcessError, carrying ffmpeg's stderr, if ffmpeg fails.
+    """
+    command = [
+        "ffmpeg", "-y", "-loglevel", "error",
+        "-f", "concat", "-safe", "0", "-i", inputs_path,
+    ]
+    if narration is None:
+        command += ["-c", "copy"]
+    else:
+        audio_codec = "copy" if probe_stream(narration, "a").get("codec_name") == "aac" else "aac"
+        # -shortest ends the output with the video, so a longer narration never adds frozen frames
+        command += [
+            "-i", narration, "-map", "0:v:0", "-map", "1:a:0", "-c:v", "copy", "-c:a", audio_codec, "-shortest",
+        ]
+    subprocess.run(command + [output_path], capture_output=True, text=True, check=True)
+
+# Stream properties that have to match for the concat demuxer to stream-copy cleanly
+STREAM_PROPERTIES = ("codec_name", "width", "height", "pix_fmt", "r_frame_rate", "time_base")
+
+def probe_stream(path, stream_type="v"):
+    """The first video (or audio) stream's properties as reported by ffprobe."""
+    command = [
+        "ffprobe", "-v", "error", "-select_streams", f"{stream_type}:0",
+        "-show_entries", "stream", "-of", "json", path,
+    ]
+    output = subprocess.run(command, capture_output=True, text=True, check=True).stdout
+    streams = json.loads(output).get("streams", [])
+    return streams[0] if streams else {}
+
+def conform(path, reference):
+    """Re-encodes one segment to the reference codec, size, pixel format, frame rate and timebase."""
+    conformed_path = path.replace(".mp4", "_conformed.mp4")
+    timescale = reference["time_base"].split("/")[1]
+    command = [
+        "ffmpeg", "-y", "-loglevel", "error", "-i", path,
+        "-vf", f"scale={reference['width']}:{reference['height']},fps={reference['r_frame_rate']}",
+        "-c:v", "libx264" if reference["codec_name"] == "h264" else reference["codec_name"],
+        "-pix_fmt", reference["pix_fmt"], "-video_track_timescale", timescale, "-an",
+        conformed_path,
+    ]
+    subprocess.run(command, check=True)
+    return conformed_path
+
+def assemble_final(out_dir, scenes, output_path, narration=None):
+    """
+    Builds the final cut from the scene videos in out_dir. Every segment is
+    probed; segments that don't match the majority's stream properties are
+    re-encoded on their own, then everything is joined with stream copy and
+    the narration is muxed in.
+    """
+    paths = [os.path.join(out_dir, f"{scene}.mp4") for scene in scenes]
+    signatures = [
+        tuple(probe_stream(path).get(key) for key in STREAM_PROPERTIES) for path in paths
+    ]
+    # Ties go to the earliest scene's format, so the same inputs always assemble the same way
+    reference = dict(zip(STREAM_PROPERTIES, max(signatures, key=signatures.count)))
+
+    filenames = []
+    for path, signature in zip(paths, signatures):
+        if dict(zip(STREAM_PROPERTIES, signature)) != reference:
+            print(f"{os.path.basename(path)} does not match {reference}, re-encoding it")
+            path = conform(path, reference)
+        filenames.append(os.path.basename(path))
+
+    inputs_path = os.path.join(out_dir, "inputs.txt")
+    write_inputs(filenames, inputs_path)
+    assemble(inputs_path, output_path, narration)
+
+def load_footprint(scene_name, quality, preview=False):
+    """Peak disk/RSS written by render.py --disk-budget/--memory-budget, if any."""
+    path = os.path.join(output_dir("footprint", quality, preview), f"{scene_name}.json")
+    if not os.path.exists(path):
+        return None
+    with open(path, "r", encoding="utf-8") as file:
+        return json.load(file)
+
+def print_report(results, total_time, footprints=None, tex_failures=0):
+    """footprints=(quality, preview) adds the peak disk/RSS of each scene."""
+    print("\nScene                       exit      wall" + ("   peak disk    peak RSS" if footprints else ""))
+    for scene_name, (exit_code, wall_time) in results.items():
+        line = f"{scene_name:<26} {exit_code:>5} {wall_time:8.1f}s"
+        footprint = load_footprint(scene_name, *footprints) if footprints else None
+        if footprint:
+            line += f" {footprint['peak_disk_mb']:8.1f} MB {footprint['peak_rss_mb']:8.1f} MB"
+        print(line)
+    print(f"Total build time: {total_time:.1f}s "
+          f"(sum of scenes: {sum(w for _, w in results.values()):.1f}s)")
+    if tex_failures:
+        print(f"{tex_failures} tex string(s) failed to pre-compile; see the scene logs for the LaTeX errors")
+
+# Example usage
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Render every scene in parallel and assemble the final video.")
+    parser.add_argument("filepath", nargs="?", default="bh_scene.py")
+    parser.add_argument("-q", "--quality", choices=QUALITY_DIRS, default="h")
+    parser.add_argument("-j", "--workers", type=int, default=os.cpu_count())
+    parser.add_argument("--scenes", nargs="+", help="Only render these scenes (default: all)")
+    parser.add_argument("--no-render", action="store_true", help="Only write inputs.txt and assemble")
+    parser.add_argument("--force", action="store_true", help="Re-render even if a scene is unchanged")
+    parser.add_argument("--no-prewarm", action="store_true", help="Don't pre-compile tex strings before rendering")
+    parser.add_argument("--static-holds", action="store_true", help="Encode static waits as one padded frame")
+    parser.add_argument("--background-cache", action="store_true", help="Reuse static backgrounds across animations")
+    parser.add_argument("--coalesce", type=float, default=0, metavar="SECONDS",
+                        help="Merge consecutive plays into partial movies of at least SECONDS")
+    parser.add_argument("--profile", action="store_true", help="Write per-animation profiles to media/profiles/<quality dir>")
+    parser.add_argument("--slice", action="append", default=[], metavar="SCENE=N",
+                        help="Split SCENE into N animation ranges rendered in parallel")
+    parser.add_argument("--preview", action="store_true", help="Fast low-resolution draft in media_preview")
+    parser.add_argument("--narration", help="Audio file to mux into the final video")
+    parser.add_argument("--ladder", nargs="+", choices=QUALITY_DIRS, metavar="QUALITY",
+                        help="Render each scene once and output all of these qualities")
+    parser.add_argument("--disk-budget", type=float, default=0, metavar="MB",
+                        help="Per scene, merge partial movies into segments beyond MB of unmerged files")
+    parser.add_argument("--memory-budget", type=float, default=0, metavar="MB",
+                        help="Per scene, above MB of RSS merge partial movies early and release cached frames")
+    parser.add_argument("--resume", action="store_true",
+                        help="Continue interrupted scene renders from their last checkpoint")
+    parser.add_argument("-o", "--output", default="final.mp4")
+    args = parser.parse_args()
+    # render.py refuses these combinations; fail here before any job is scheduled
+    if args.ladder and (args.static_holds or args.slice or args.preview):
+        parser.error("--ladder can't be combined with --static-holds, --slice or --preview")
+    if (args.disk_budget > 0 or args.memory_budget > 0) and args.coalesce > 0:
+        parser.error("--disk-budget/--memory-budget can't be combined with --coalesce")
+
+    # Render modes forwarded to render.py
+    render_flags = []
+    if args.static_holds:
+        render_flags.append("--static-holds")
+    if args.background_cache:
+        render_flags.append("--background-cache")
+    if args.coalesce > 0:
+        render_flags += ["--coalesce", str(args.coalesce)]
+    if args.preview:
+        render_flags.append("--preview")
+    if args.ladder:
+        # The top rung is the one rendered; the others are encoded alongside it
+        args.quality = max(args.ladder, key=lambda q: int(QUALITY_DIRS[q].split("p")[0]))
+        render_flags += ["--ladder", *args.ladder]
+
+    classes = extract_class_names(args.filepath)
+    scenes = args.scenes or classes
+    out_dir = video_dir(args.filepath, args.quality, args.preview)
+
+    # Only scenes whose hash changed since the last build are rendered again
+    manifest_path = os.path.join(out_dir, "build_manifest.json")
+    manifest = load_manifest(manifest_path)
+    hashes = scene_hashes(args.filepath, {"quality": args.quality, "flags": render_flags})
+    # Added after hashing: profiling, resuming and budgets produce the same video as a plain render
+    if args.profile:
+        render_flags.append("--profile")
+    if args.resume:
+        render_flags.append("--resume")
+    if args.disk_budget > 0:
+        render_flags += ["--disk-budget", str(args.disk_budget)]
+    if args.memory_budget > 0:
+        render_flags += ["--memory-budget", str(args.memory_budget)]
+    if not args.force:
+        # With a ladder every rung has to be there, not just the top one
+        rung_dirs = [video_dir(args.filepath, quality, args.preview) for quality in args.ladder or [args.quality]]
+        stale = stale_scenes(scenes, hashes, manifest, rung_dirs)
+        for scene in scenes:
+            if scene not in stale:
+                print(f"[{scene}] unchanged, reusing {scene}.mp4")
+        scenes = stale
+
+    build_start = time.perf_counter()
+    if not args.no_render and scenes:
+        # Compile all tex up front in parallel instead of serially inside each construct()
+        tex_failures = 0
+        if not args.no_prewarm:
+            # Previews read their tex from media_preview/Tex
+            tex_failures = prewarm(args.filepath, args.workers, PREVIEW_MEDIA_DIR if args.preview else "media")
+        slices = {scene: int(n) for scene, n in (item.split("=") for item in args.slice)}
+        results = render_all(args.filepath, scenes, args.quality, args.workers, render_flags, slices)
+        print_report(results, time.perf_counter() - build_start,
+                     footprints=(args.quality, args.preview) if args.disk_budget > 0 or args.memory_budget > 0 else None,
+                     tex_failures=tex_failures)
+
+        os.makedirs(out_dir, exist_ok=True)
+        for scene_name, (exit_code, _) in results.items():
+            if exit_code == 0:
+                manifest[scene_name] = hashes[scene_name]
+        save_manifest(manifest_path, manifest)
+
+        if any(exit_code != 0 for exit_code, _ in results.values()):
+            sys.exit("Some scenes failed to render, not assembling the final video.")
 
-    print(f"Class names extracted from {filepath} and written to {path}")
+    # Stream-copy the scenes (listed in inputs.txt next to them) into the final cut
+    for quality in args.ladder or [args.quality]:
+        rung_dir = video_dir(args.filepath, quality, args.preview)
+        output_path = os.path.join(rung_dir, args.output)
+        try:
+            assemble_final(rung_dir, classes, output_path, args.narration)
+        except subprocess.CalledProcessError as error:
+            sys.exit(f"ffmpeg failed to assemble the final video:\n{error.stderr}")
+        print(f"Final video written to {output_path}")
@@ -0,0 +1,76 @@
+import numpy as np
+
+from manim import BLUE, RIGHT, UP, WHITE, YELLOW, Animation, VGroup, VMobject, linear
+
+from coinflips import stream_macrostate_counts
+
+class MacrostateHistogram(VGroup):
+    """
+    Bars for the fraction of throws with each number of heads, with the exact
+    binomial distribution drawn over them as a curve. set_counts moves the
+    corners of the existing bars, so streaming new counts never rebuilds
+    mobjects. Heights are scaled so the binomial peak reaches the top.
+    """
+    def __init__(self, pmf, width=6, height=2, bar_color=BLUE, curve_color=YELLOW, **kwargs):
+        super().__init__(**kwargs)
+        self.pmf = np.asarray(pmf, dtype=float)
+        self.bar_width = width / len(self.pmf)
+        self.unit_height = height / self.pmf.max()
+        self.lefts = np.arange(len(self.pmf)) * self.bar_width - width / 2
+
+        self.bars = VGroup(*[
+            VMobject(fill_color=bar_color, fill_opacity=0.8, stroke_width=0) for _ in self.pmf
+        ])
+        self.axis = VMobject(stroke_color=WHITE, stroke_width=2)
+        self.axis.set_points_as_corners([-width / 2 * RIGHT, width / 2 * RIGHT])
+        self.curve = VMobject(stroke_color=curve_color, stroke_width=3)
+        self.curve.set_points_smoothly([
+            (left + self.bar_width / 2) * RIGHT + p * self.unit_height * UP
+            for left, p in zip(self.lefts, self.pmf)
+        ])
+        self.add(self.bars, self.axis, self.curve)
+        self.set_counts(np.zeros(len(self.pmf)))
+
+    def set_counts(self, counts):
+        total = counts.sum()
+        fractions = counts / total if total else np.zeros(len(counts))
+        # Bars are positioned relative to the axis so moving the group moves them too
+        origin = self.axis.get_start()
+        for bar, left, fraction in zip(self.bars, self.lefts, fractions):
+            bottom_left = origin + (left - self.lefts[0]) * RIGHT
+            top = fraction * self.unit_height * UP
+            bar.set_points_as_corners([
+                bottom_left, bottom_left + top,
+                bottom_left + top + self.bar_width * RIGHT, bottom_left + self.bar_width * RIGHT,
+                bottom_left,
+            ])
+        return self
+
+class StreamHistogram(Animation):
+    """
+    Streams simulated throws (coinflips.stream_macrostate_counts) into the
+    histogram as the animation progresses, one chunk of running counts per
+    step, so only the current counts are ever held. The stream parameters are
+    kept as attributes so manim's animation hash changes when they do.
+    """
+    def __init__(self, histogram, num_coins, trials, chunk_size=1 << 16, seed=0, rate_func=linear, **kwargs):
+        self.num_coins = num_coins
+        self.trials = trials
+        self.chunk_size = chunk_size
+        self.seed = seed
+        self.num_chunks = -(-trials // chunk_size)
+        super().__init__(histogram, rate_func=rate_func, **kwargs)
+
+    def begin(self):
+        self.counts_stream = stream_macrostate_counts(self.num_coins, self.trials, self.chunk_size, self.seed)
+        self.chunks_drawn = 0
+        super().begin()
+
+    def interpolate_mobject(self, alpha):
+        target = min(self.num_chunks, int(np.ceil(alpha * self.num_chunks)))
+        counts = None
+        while self.chunks_drawn < target:
+            counts = next(self.counts_stream)
+            self.chunks_drawn += 1
+        if counts is not None:
+            self.mobject.set_counts(counts)
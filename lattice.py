@@ -0,0 +1,234 @@
+import hashlib
+import inspect
+import os
+
+import numpy as np
+
+# Warped geometry is cached here, one compressed .npz per parameter set
+LATTICE_CACHE_DIR = os.path.join("media", "lattice_cache")
+LATTICE_CACHE_MAX_BYTES = 64 * 1024 * 1024
+
+
+def warp_points(points, schwarzschild_radius, warp_amplitude):
+    """
+    Batched version of the Schwarzschild warp used by PhysicalBlackHoleLattice.
+    Takes an (N, 3) array of points (any leading shape works) and returns the
+    warped points in a single NumPy pass, with the same piecewise behaviour as
+    the original per-point function.
+    """
+    points = np.asarray(points, dtype=float)
+    r = np.linalg.norm(points, axis=-1)
+
+    # Avoid dividing by zero; the origin is left where it is.
+    safe_r = np.where(r == 0, 1.0, r)
+
+    # Inside the horizon everything is pushed out onto the sphere,
+    # outside it is pulled in by the metric-derived warp factor.
+    outside = r >= schwarzschild_radius
+    r_outside = np.where(outside, safe_r, schwarzschild_radius)
+    warp_factor = 1 - np.sqrt(1 - schwarzschild_radius / r_outside)
+    new_radius = np.maximum(schwarzschild_radius, r - warp_amplitude * warp_factor)
+    new_radius = np.where(outside, new_radius, schwarzschild_radius)
+
+    scale = np.where(r == 0, 1.0, new_radius / safe_r)
+    return points * scale[..., np.newaxis]
+
+
+def lattice_endpoints(grid_bounds, grid_step):
+    """
+    Start and end points of every straight lattice line, in the same order the
+    scene has always generated them: for each (i, j) one line along z, one
+    along y and one along x. Returns two (L, 3) arrays.
+    """
+    coords = np.arange(-grid_bounds, grid_bounds + grid_step, grid_step)
+    i, j = np.meshgrid(coords, coords, indexing="ij")
+    i, j = i.ravel(), j.ravel()
+    lo = np.full_like(i, -grid_bounds)
+    hi = np.full_like(i, grid_bounds)
+
+    starts = np.stack([
+        np.stack([i, j, lo], axis=-1),
+        np.stack([i, lo, j], axis=-1),
+        np.stack([lo, i, j], axis=-1),
+    ], axis=1).reshape(-1, 3)
+    ends = np.stack([
+        np.stack([i, j, hi], axis=-1),
+        np.stack([i, hi, j], axis=-1),
+        np.stack([hi, i, j], axis=-1),
+    ], axis=1).reshape(-1, 3)
+    return starts, ends
+
+
+def simplify_polyline(points, tolerance):
+    """
+    Ramer-Douglas-Peucker simplification of a densely sampled line: keeps only
+    the samples needed for the polyline to stay within tolerance of the dense
+    one. Straight stretches collapse to their endpoints, while strongly
+    curved stretches near the horizon keep most of their samples.
+    """
+    keep = np.zeros(len(points), dtype=bool)
+    keep[0] = keep[-1] = True
+    stack = [(0, len(points) - 1)]
+    while stack:
+        i, j = stack.pop()
+        if j <= i + 1:
+            continue
+        chord = points[j] - points[i]
+        offsets = points[i + 1:j] - points[i]
+        chord_length_sq = np.dot(chord, chord)
+        if chord_length_sq == 0:
+            distances = np.linalg.norm(offsets, axis=-1)
+        else:
+            t = np.clip(offsets @ chord / chord_length_sq, 0, 1)
+            distances = np.linalg.norm(offsets - t[:, np.newaxis] * chord, axis=-1)
+        k = int(np.argmax(distances))
+        if distances[k] > tolerance:
+            mid = i + 1 + k
+            keep[mid] = True
+            stack.append((i, mid))
+            stack.append((mid, j))
+    return points[keep]
+
+
+def build_warped_lattice(
+    schwarzschild_radius,
+    grid_bounds,
+    grid_step,
+    warp_amplitude,
+    inner_rgb,
+    outer_rgb,
+    samples=101,
+    tolerance=None,
+):
+    """
+    Builds every warped lattice line from one batched warp evaluation.
+
+    With a tolerance (in scene units), each densely sampled line is simplified
+    so it keeps only as many points as its curvature needs.
+
+    Returns (points, rgbs, opacities):
+      points    -- list of (n, 3) polylines, one per line
+      rgbs      -- (L, 3) stroke colour, blended from inner to outer by distance
+      opacities -- (L,) stroke opacity, fading out towards the edge of the grid
+    """
+    starts, ends = lattice_endpoints(grid_bounds, grid_step)
+
+    # Sample all lines at once: (L, samples, 3), then warp in a single call.
+    t = np.linspace(0, 1, samples)[np.newaxis, :, np.newaxis]
+    flat = starts[:, np.newaxis, :] + t * (ends - starts)[:, np.newaxis, :]
+    points = warp_points(
+        flat.reshape(-1, 3), schwarzschild_radius, warp_amplitude
+    ).reshape(flat.shape)
+
+    # Colour and opacity come from the warped midpoint of each line
+    midpoints = warp_points((starts + ends) / 2, schwarzschild_radius, warp_amplitude)
+    distance = np.linalg.norm(midpoints, axis=-1)
+    alpha = np.minimum(1, distance / (grid_bounds * 1.2))
+
+    inner_rgb = np.asarray(inner_rgb, dtype=float)
+    outer_rgb = np.asarray(outer_rgb, dtype=float)
+    rgbs = inner_rgb + alpha[:, np.newaxis] * (outer_rgb - inner_rgb)
+    opacities = 1 - alpha**2
+
+    if tolerance is None:
+        return list(points), rgbs, opacities
+    return [simplify_polyline(line, tolerance) for line in points], rgbs, opacities
+
+
+def lattice_cache_key(*params):
+    """
+    Hash of the lattice parameters together with the source of the warp and
+    the builder, so editing either function invalidates old cache entries.
+    """
+    digest = hashlib.sha256()
+    for func in (warp_points, lattice_endpoints, simplify_polyline, build_warped_lattice):
+        digest.update(inspect.getsource(func).encode("utf-8"))
+    for param in params:
+        digest.update(np.asarray(param, dtype=float).tobytes())
+    return digest.hexdigest()[:32]
+
+
+def evict_lattice_cache(cache_dir=LATTICE_CACHE_DIR, max_bytes=LATTICE_CACHE_MAX_BYTES):
+    """
+    Deletes least recently used cache files, including temporary files left
+    behind by crashed renders, until the cache fits in max_bytes. Other
+    renders share the cache, so files may vanish while this runs.
+    """
+    if not os.path.isdir(cache_dir):
+        return
+    entries = []
+    for name in os.listdir(cache_dir):
+        if name.endswith((".npz", ".tmp")):
+            path = os.path.join(cache_dir, name)
+            try:
+                stat = os.stat(path)
+            except FileNotFoundError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, path))
+
+    total = sum(size for _, size, _ in entries)
+    for _, size, path in sorted(entries):
+        if total <= max_bytes:
+            break
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+        total -= size
+
+
+def cached_warped_lattice(
+    schwarzschild_radius,
+    grid_bounds,
+    grid_step,
+    warp_amplitude,
+    inner_rgb,
+    outer_rgb,
+    samples=101,
+    tolerance=None,
+    cache_dir=LATTICE_CACHE_DIR,
+    max_bytes=LATTICE_CACHE_MAX_BYTES,
+):
+    """
+    Same as build_warped_lattice, but loads the result from the on-disk cache
+    when nothing that affects the geometry has changed since the last render.
+    """
+    params = (
+        schwarzschild_radius, grid_bounds, grid_step, warp_amplitude,
+        inner_rgb, outer_rgb, samples,
+    )
+    key_params = params if tolerance is None else params + (tolerance,)
+    path = os.path.join(cache_dir, f"{lattice_cache_key(*key_params)}.npz")
+
+    try:
+        # Touch the file so eviction treats it as recently used
+        os.utime(path)
+        with np.load(path) as data:
+            # Lines are stored back to back; counts says where each one ends
+            points = np.split(data["points"], np.cumsum(data["counts"])[:-1])
+            return points, data["rgbs"], data["opacities"]
+    except FileNotFoundError:
+        # Not cached yet, or evicted by another render in the meantime
+        pass
+
+    points, rgbs, opacities = build_warped_lattice(*params, tolerance=tolerance)
+
+    os.makedirs(cache_dir, exist_ok=True)
+    # Write to a temporary file first so a concurrent render never reads a half-written entry
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, "wb") as file:
+        np.savez_compressed(
+            file,
+            points=np.concatenate(points),
+            counts=np.array([len(line) for line in points]),
+            rgbs=rgbs,
+            opacities=opacities,
+        )
+    try:
+        os.replace(tmp_path, path)
+    except FileNotFoundError:
+        # Another render's eviction removed the temporary file; the lattice just isn't cached
+        return points, rgbs, opacities
+    evict_lattice_cache(cache_dir, max_bytes)
+
+    return points, rgbs, opacities
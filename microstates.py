@@ -0,0 +1,71 @@
+import itertools
+import math
+
+def microstates(num_coins, order="macrostate"):
+    """
+    Lazily yields every microstate of num_coins coins as a tuple of "H"/"T".
+
+    order="macrostate" -- grouped by number of heads, most heads first, which
+                          is the order of the coin table in WhatIsEntropy
+    order="lexicographic" -- HHH, HHT, HTH, ... as binary counting
+    order="gray"       -- reflected Gray code: neighbouring rows differ by one flip
+    """
+    if order == "macrostate":
+        for heads in range(num_coins, -1, -1):
+            for positions in itertools.combinations(range(num_coins), heads):
+                state = ["T"] * num_coins
+                for position in positions:
+                    state[position] = "H"
+                yield tuple(state)
+    elif order == "lexicographic":
+        yield from itertools.product("HT", repeat=num_coins)
+    elif order == "gray":
+        for i in range(2**num_coins):
+            code = i ^ (i >> 1)
+            yield tuple("T" if code >> (num_coins - 1 - bit) & 1 else "H" for bit in range(num_coins))
+    else:
+        raise ValueError(f"Unknown microstate order: {order!r}")
+
+def window(states, start, size):
+    """Rows start..start+size of a microstate generator, without building the others."""
+    return list(itertools.islice(states, start, start + size))
+
+def multiplicity(num_coins, heads):
+    """Exact number of microstates with the given number of heads."""
+    return math.comb(num_coins, heads)
+
+def multiplicities(num_coins):
+    """(heads, multiplicity) for every macrostate, most heads first."""
+    return [(heads, multiplicity(num_coins, heads)) for heads in range(num_coins, -1, -1)]
+
+def log10_multiplicity(num_coins, heads):
+    """log10 of the multiplicity, usable for N far too large to hold C(N, k) comfortably."""
+    return (
+        math.lgamma(num_coins + 1) - math.lgamma(heads + 1) - math.lgamma(num_coins - heads + 1)
+    ) / math.log(10)
+
+def log10_total_microstates(num_coins):
+    return num_coins * math.log10(2)
+
+def scientific(log10_value, digits=3):
+    """
+    Mantissa and exponent of 10**log10_value as strings, e.g. ("1.27", "30")
+    for 2^100, without ever forming the number itself.
+    """
+    exponent = math.floor(log10_value)
+    mantissa = 10 ** (log10_value - exponent)
+    # Rounding can carry the mantissa up to 10.0
+    if round(mantissa, digits - 1) >= 10:
+        mantissa /= 10
+        exponent += 1
+    return f"{mantissa:.{digits - 1}f}", str(exponent)
+
+def scientific_tex(log10_value, digits=3):
+    mantissa, exponent = scientific(log10_value, digits)
+    return rf"{mantissa} \times 10^{{{exponent}}}"
+
+def count_tex(count, exact_digits=6):
+    """An exact count while it stays readable, its scientific approximation after that."""
+    if count < 10**exact_digits:
+        return str(count)
+    return scientific_tex(math.log10(count))
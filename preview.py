@@ -0,0 +1,17 @@
+import os
+
+# Set by render.py --preview; scenes read it when they construct their mobjects
+PREVIEW_ENV = "BH_PREVIEW"
+
+# Draft renders for narration review go to their own media tree
+PREVIEW_MEDIA_DIR = "media_preview"
+PREVIEW_CONFIG = {
+    "pixel_width": 640,
+    "pixel_height": 360,
+    "frame_rate": 15,
+    "media_dir": PREVIEW_MEDIA_DIR,
+}
+PREVIEW_QUALITY_DIR = "360p15"
+
+def is_preview():
+    return os.environ.get(PREVIEW_ENV) == "1"
@@ -0,0 +1,133 @@
+import json
+import os
+import resource
+import time
+
+from manim.renderer.cairo_renderer import CairoRenderer
+from manim.scene.scene_file_writer import SceneFileWriter
+from manim.utils.family import extract_mobject_family_members
+
+class RenderProfiler:
+    """
+    Opt-in instrumentation of a scene render. Every play/wait becomes one
+    record, with its wall time split into phases:
+
+      construct   -- scene code run since the previous animation (mobject and tex construction)
+      interpolate -- compiling and interpolating the animation, updaters
+      rasterize   -- Cairo drawing of frames (CairoRenderer.update_frame)
+      encode      -- handing frames to the video encoder and closing the partial
+                     movie (SceneFileWriter.write_frame and end_animation), which
+                     includes extending static holds
+
+    plus the frames the animation adds to the video (held_frames of them added
+    by static holds without being written one by one), time per frame,
+    mobject/point counts and the process's RSS high-water mark so far.
+    """
+    def __init__(self, scene_name):
+        self.scene_name = scene_name
+        self.animations = []
+        self.current = None
+        self.last_play_end = None
+
+    def install(self):
+        profiler = self
+        original_play = CairoRenderer.play
+        original_update_frame = CairoRenderer.update_frame
+        original_write_frame = SceneFileWriter.write_frame
+        original_end_animation = SceneFileWriter.end_animation
+
+        def play(renderer, scene, *args, **kwargs):
+            start = time.perf_counter()
+            construct = start - profiler.last_play_end if profiler.last_play_end else 0.0
+            profiler.current = {"rasterize": 0.0, "encode": 0.0, "frames": 0, "held_frames": 0}
+            try:
+                original_play(renderer, scene, *args, **kwargs)
+            finally:
+                end = time.perf_counter()
+                profiler.record(scene, construct, end - start)
+                profiler.last_play_end = end
+
+        def update_frame(renderer, *args, **kwargs):
+            start = time.perf_counter()
+            original_update_frame(renderer, *args, **kwargs)
+            if profiler.current is not None:
+                profiler.current["rasterize"] += time.perf_counter() - start
+
+        def write_frame(file_writer, *args, **kwargs):
+            start = time.perf_counter()
+            original_write_frame(file_writer, *args, **kwargs)
+            if profiler.current is not None:
+                profiler.current["encode"] += time.perf_counter() - start
+                profiler.current["frames"] += kwargs.get("num_frames", args[1] if len(args) > 1 else 1)
+
+        def end_animation(file_writer, *args, **kwargs):
+            # A static hold writes one frame and is extended to the rest when its movie is closed
+            held = max(getattr(file_writer, "pending_hold_frames", 0) - 1, 0)
+            start = time.perf_counter()
+            original_end_animation(file_writer, *args, **kwargs)
+            if profiler.current is not None:
+                profiler.current["encode"] += time.perf_counter() - start
+                profiler.current["held_frames"] += held
+
+        CairoRenderer.play = play
+        CairoRenderer.update_frame = update_frame
+        SceneFileWriter.write_frame = write_frame
+        SceneFileWriter.end_animation = end_animation
+        self.last_play_end = time.perf_counter()
+        return self
+
+    def record(self, scene, construct, wall):
+        phases = self.current
+        self.current = None
+        family = extract_mobject_family_members(scene.mobjects)
+        frames = phases["frames"] + phases["held_frames"]
+        self.animations.append({
+            "index": len(self.animations),
+            "animations": [type(animation).__name__ for animation in scene.animations or []],
+            "run_time": scene.duration,
+            "wall": wall,
+            "construct": construct,
+            "interpolate": wall - phases["rasterize"] - phases["encode"],
+            "rasterize": phases["rasterize"],
+            "encode": phases["encode"],
+            "frames": frames,
+            "held_frames": phases["held_frames"],
+            "time_per_frame": wall / frames if frames else None,
+            "mobjects": len(family),
+            "points": int(sum(len(mob.points) for mob in family)),
+            # ru_maxrss (kilobytes on Linux) is the high-water mark of the whole
+            # process so far, not the peak during this animation
+            "max_rss_so_far_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+        })
+
+    def report(self):
+        phases = ("construct", "interpolate", "rasterize", "encode")
+        return {
+            "scene": self.scene_name,
+            "totals": {phase: sum(a[phase] for a in self.animations) for phase in phases},
+            "frames": sum(a["frames"] for a in self.animations),
+            "held_frames": sum(a["held_frames"] for a in self.animations),
+            # The high-water mark is cumulative, so the last animation's is the render's peak
+            "peak_rss_mb": max((a["max_rss_so_far_mb"] for a in self.animations), default=0.0),
+            "animations": self.animations,
+        }
+
+    def folded_stacks(self):
+        """Lines in the collapsed-stack format read by flamegraph.pl and speedscope (microseconds)."""
+        lines = []
+        for a in self.animations:
+            name = f"{a['index']:03d} {'+'.join(a['animations']) or 'Wait'}"
+            for phase in ("construct", "interpolate", "rasterize", "encode"):
+                microseconds = int(a[phase] * 1e6)
+                if microseconds > 0:
+                    lines.append(f"{self.scene_name};{name};{phase} {microseconds}")
+        return lines
+
+    def write(self, directory):
+        os.makedirs(directory, exist_ok=True)
+        json_path = os.path.join(directory, f"{self.scene_name}.json")
+        with open(json_path, "w", encoding="utf-8") as file:
+            json.dump(self.report(), file, indent=2)
+        with open(os.path.join(directory, f"{self.scene_name}.folded"), "w", encoding="utf-8") as file:
+            file.write("\n".join(self.folded_stacks()) + "\n")
+        return json_path
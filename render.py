@@ -0,0 +1,829 @@
+import argparse
+import gc
+import hashlib
+import importlib
+import json
+import os
+import resource
+import subprocess
+import sys
+import time
+
+import numpy as np
+from manim import Camera, ThreeDCamera, ThreeDScene, VMobject, config, logger, tempconfig
+from manim.renderer.cairo_renderer import CairoRenderer
+from manim.scene.scene_file_writer import SceneFileWriter
+from manim.utils.family import extract_mobject_family_members
+
+from get_scenes import output_dir, scene_hashes
+from preview import PREVIEW_CONFIG, PREVIEW_ENV
+from profiler import RenderProfiler
+
+# manim quality flag -> config.quality name
+QUALITY_NAMES = {
+    "l": "low_quality",
+    "m": "medium_quality",
+    "h": "high_quality",
+    "p": "production_quality",
+    "k": "fourk_quality",
+}
+
+# --- STATIC HOLDS ---
+# manim already recognises a static wait (a Wait with no updaters anywhere in
+# the scene, which also rules out ambient camera rotation) and freezes the
+# frame, but it still pipes every copy of that frame through the encoder.
+# With static holds enabled only one frame is encoded, and ffmpeg loops that
+# one-frame movie to the full length of the hold with stream copy, so the hold
+# keeps the encoder settings of manim's own partial movies. Partial movies are
+# written to a scratch file and only published under their cached name once
+# complete, so a crash never leaves a one-frame hold behind as a cached partial.
+
+def scratch_path(path):
+    base, extension = os.path.splitext(path)
+    return f"{base}_writing{extension}"
+
+def _hold_begin_animation(self, allow_write=False, file_path=None):
+    if allow_write and file_path is None and config.write_to_movie:
+        # add_partial_movie_file has just appended this play's cached path
+        self.publish_path = self.sections[-1].partial_movie_files[-1]
+        file_path = scratch_path(self.publish_path)
+    _original_begin_animation(self, allow_write, file_path)
+
+def _freeze_current_frame(self, duration):
+    dt = 1 / self.camera.frame_rate
+    num_frames = int(duration / dt)
+    if self.skip_animations or num_frames <= 1:
+        return _original_freeze_current_frame(self, duration)
+
+    self.add_frame(self.get_frame(), num_frames=1)
+    self.time += (num_frames - 1) * dt
+    self.file_writer.pending_hold_frames = num_frames
+
+def _end_animation(self, allow_write=False):
+    _original_end_animation(self, allow_write)
+    num_frames = getattr(self, "pending_hold_frames", 0)
+    self.pending_hold_frames = 0
+    publish_path = getattr(self, "publish_path", None)
+    self.publish_path = None
+    if not allow_write or publish_path is None:
+        return
+    written_path = self.partial_movie_file_path
+    if num_frames > 1:
+        extend_hold(written_path, publish_path, num_frames)
+        os.remove(written_path)
+    else:
+        os.replace(written_path, publish_path)
+    self.partial_movie_file_path = publish_path
+
+def extend_hold(source, path, num_frames):
+    """Writes the one-frame movie source looped num_frames times to path, without re-encoding."""
+    command = [
+        "ffmpeg", "-y", "-loglevel", "error", "-stream_loop", str(num_frames - 1), "-i", source,
+        "-c", "copy", path,
+    ]
+    subprocess.run(command, check=True)
+
+_original_freeze_current_frame = CairoRenderer.freeze_current_frame
+_original_end_animation = SceneFileWriter.end_animation
+
+def enable_static_holds():
+    SceneFileWriter.begin_animation = _hold_begin_animation
+    CairoRenderer.freeze_current_frame = _freeze_current_frame
+    SceneFileWriter.end_animation = _end_animation
+
+# --- BACKGROUND CACHE ---
+# For every play/wait manim rasterizes the mobjects that animation doesn't
+# touch into a static background, and then only redraws the moving ones on top
+# each frame. That background is thrown away at the next play, even when it
+# would come out identical, e.g. the coin table behind the 18 flashing
+# rectangles in WhatIsEntropy or the polar grid in TwoDBlackHole. With the
+# background cache enabled it is kept and reused for as long as the static
+# mobjects and the camera have the same fingerprint; any change to their
+# points, colours, stroke widths or z-order, or any camera move, invalidates it.
+
+def background_fingerprint(camera, static_mobjects):
+    fingerprint = [hash(np.asarray(camera.frame_center).tobytes())]
+    if isinstance(camera, ThreeDCamera):
+        fingerprint.append((
+            camera.get_phi(), camera.get_theta(), camera.get_gamma(),
+            camera.get_zoom(), camera.get_focal_distance(),
+        ))
+    for mob in extract_mobject_family_members(static_mobjects, only_those_with_points=True):
+        fingerprint.append((id(mob), mob.z_index, hash(mob.points.tobytes())))
+        if isinstance(mob, VMobject):
+            fingerprint.append((
+                hash(mob.get_stroke_rgbas().tobytes()),
+                hash(mob.get_fill_rgbas().tobytes()),
+                mob.get_stroke_width(),
+            ))
+    return hash(tuple(fingerprint))
+
+def _save_static_frame_data(self, scene, static_mobjects):
+    if not static_mobjects:
+        return _original_save_static_frame_data(self, scene, static_mobjects)
+
+    key = background_fingerprint(self.camera, static_mobjects)
+    if key == getattr(self, "background_key", None):
+        self.static_image = self.background_image
+        return self.static_image
+
+    _original_save_static_frame_data(self, scene, static_mobjects)
+    self.background_key = key
+    self.background_image = self.static_image
+    return self.static_image
+
+_original_save_static_frame_data = CairoRenderer.save_static_frame_data
+
+def enable_background_cache():
+    CairoRenderer.save_static_frame_data = _save_static_frame_data
+
+# --- COALESCED PLAYS ---
+# Every play/wait normally gets its own partial movie file, encoder stream and
+# concat entry, which adds up for loops of 0.4 second flashes. When coalescing,
+# the partial movie stream stays open after an animation until the run of
+# animations written into it covers at least `coalesce_seconds`; the plays
+# that joined the run get no partial movie entry of their own. The frames are
+# the same, there are just fewer files. With static holds enabled a hold
+# closes the run before it and gets a partial movie of its own, since only a
+# one-frame movie can be looped to the length of the hold.
+
+def _coalescing_begin_animation(self, allow_write=False, file_path=None):
+    if getattr(self, "coalescing", False):
+        if allow_write:
+            # Keep writing into the open partial movie
+            self.joined_path = self.sections[-1].partial_movie_files[-1]
+            self.sections[-1].partial_movie_files[-1] = None
+            return
+        _previous_end_animation(self, True)
+        self.coalescing = False
+    _previous_begin_animation(self, allow_write, file_path)
+    self.run_start_time = self.renderer.time
+
+def _coalescing_freeze_current_frame(self, duration):
+    file_writer = self.file_writer
+    if not self.skip_animations and getattr(file_writer, "coalescing", False):
+        # Close the run without this play, then reopen a partial movie for the hold alone
+        file_writer.coalescing = False
+        _previous_end_animation(file_writer, True)
+        file_writer.sections[-1].partial_movie_files[-1] = file_writer.joined_path
+        _previous_begin_animation(file_writer, True)
+        file_writer.run_start_time = self.time
+    return _previous_freeze_current_frame(self, duration)
+
+def _coalescing_end_animation(self, allow_write=False):
+    run_length = self.renderer.time - getattr(self, "run_start_time", 0)
+    pending_hold = getattr(self, "pending_hold_frames", 0)
+    if allow_write and not pending_hold and run_length < _coalesce_seconds:
+        self.coalescing = True
+        return
+    self.coalescing = False
+    _previous_end_animation(self, allow_write)
+
+def _coalescing_finish(self):
+    if getattr(self, "coalescing", False):
+        _previous_end_animation(self, True)
+        self.coalescing = False
+    _original_finish(self)
+
+_original_begin_animation = SceneFileWriter.begin_animation
+_original_finish = SceneFileWriter.finish
+_previous_begin_animation = None
+_previous_end_animation = None
+_previous_freeze_current_frame = None
+_coalesce_seconds = 0
+
+def enable_coalescing(seconds):
+    global _previous_begin_animation, _previous_end_animation, _previous_freeze_current_frame, _coalesce_seconds
+    # Chains onto static holds when they are enabled first
+    _previous_begin_animation = SceneFileWriter.begin_animation
+    _previous_end_animation = SceneFileWriter.end_animation
+    _coalesce_seconds = seconds
+    SceneFileWriter.begin_animation = _coalescing_begin_animation
+    SceneFileWriter.end_animation = _coalescing_end_animation
+    SceneFileWriter.finish = _coalescing_finish
+    if CairoRenderer.freeze_current_frame is _freeze_current_frame:
+        _previous_freeze_current_frame = CairoRenderer.freeze_current_frame
+        CairoRenderer.freeze_current_frame = _coalescing_freeze_current_frame
+
+# --- PREVIEW TIMING ---
+# At preview frame rates every play/wait is rounded to a whole number of
+# frames, and over a few hundred animations that rounding adds up to audible
+# drift against the narration. In preview mode each static wait is stretched
+# or shortened by the frames needed to land exactly on the scene time it would
+# end at in the production render.
+
+def _timed_play(self, scene, *args, **kwargs):
+    self.scene_time = getattr(self, "scene_time", 0.0)
+    _timed_original_play(self, scene, *args, **kwargs)
+    self.scene_time += scene.duration
+
+def _timed_freeze_current_frame(self, duration):
+    dt = 1 / self.camera.frame_rate
+    target_frames = round((self.scene_time + duration) / dt)
+    num_frames = max(0, target_frames - round(self.time / dt))
+    # Half a frame of slack so int(duration / dt) inside manim lands on num_frames
+    return _timed_original_freeze_current_frame(self, (num_frames + 0.5) * dt)
+
+_timed_original_play = None
+_timed_original_freeze_current_frame = None
+
+def enable_preview():
+    global _timed_original_play, _timed_original_freeze_current_frame
+    os.environ[PREVIEW_ENV] = "1"
+    _timed_original_play = CairoRenderer.play
+    _timed_original_freeze_current_frame = CairoRenderer.freeze_current_frame
+    CairoRenderer.play = _timed_play
+    CairoRenderer.freeze_current_frame = _timed_freeze_current_frame
+
+# --- RESOLUTION LADDER ---
+# Renders construct, tex, geometry and interpolation once, at the top rung of
+# the ladder. Every frame manim writes is also piped as raw RGBA to one ffmpeg
+# encoder per lower rung, which scales it down (and drops frames for lower
+# frame rates) in its own process, next to the main encoder.
+
+# manim quality flag -> (width, height, fps), matching manim's quality presets
+LADDER_SIZES = {
+    "l": (854, 480, 15),
+    "m": (1280, 720, 30),
+    "h": (1920, 1080, 60),
+    "p": (2560, 1440, 60),
+    "k": (3840, 2160, 60),
+}
+
+def ladder_top(qualities):
+    """The rung with the most pixels, which is the one actually rasterized."""
+    return max(qualities, key=lambda quality: LADDER_SIZES[quality][0])
+
+def open_ladder_encoder(path, quality, source_size, source_fps):
+    width, height, fps = LADDER_SIZES[quality]
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    command = [
+        "ffmpeg", "-y", "-loglevel", "error",
+        "-f", "rawvideo", "-pix_fmt", "rgba", "-s", f"{source_size[0]}x{source_size[1]}",
+        "-r", str(source_fps), "-i", "-",
+        "-vf", f"scale={width}:{height}:flags=area,fps={fps}",
+        "-c:v", "libx264", "-pix_fmt", "yuv420p", path,
+    ]
+    return subprocess.Popen(command, stdin=subprocess.PIPE)
+
+def _ladder_write_frame(self, frame, *args, **kwargs):
+    _ladder_original_write_frame(self, frame, *args, **kwargs)
+    num_frames = kwargs.get("num_frames", args[0] if args else 1)
+    data = np.ascontiguousarray(frame).tobytes()
+    for encoder in _ladder_encoders:
+        for _ in range(num_frames):
+            encoder.stdin.write(data)
+
+_ladder_original_write_frame = SceneFileWriter.write_frame
+_ladder_encoders = []
+
+def enable_ladder(filepath, name, qualities):
+    """Starts an encoder for every rung below the top one; returns them so they can be closed."""
+    module = os.path.splitext(os.path.basename(filepath))[0]
+    top = ladder_top(qualities)
+    source_size, source_fps = LADDER_SIZES[top][:2], LADDER_SIZES[top][2]
+    for quality in qualities:
+        if quality == top:
+            continue
+        _, height, fps = LADDER_SIZES[quality]
+        path = os.path.join(config.media_dir, "videos", module, f"{height}p{fps}", f"{name}.mp4")
+        _ladder_encoders.append(open_ladder_encoder(path, quality, source_size, source_fps))
+    SceneFileWriter.write_frame = _ladder_write_frame
+    return _ladder_encoders
+
+def close_ladder():
+    for encoder in _ladder_encoders:
+        encoder.stdin.close()
+        encoder.wait()
+    _ladder_encoders.clear()
+
+# --- CHECKPOINTS ---
+# At animation boundaries, at most every `interval` seconds, the render writes
+# a checkpoint: the index of the next animation, the partial movie of every
+# animation so far (each one is closed by then), the camera state and a
+# digest of every mobject. construct() can't be entered half way, so resuming
+# runs it again with the animations before the checkpoint fast-forwarded the
+# way --animations skips them: applied in one step, never rasterized or
+# encoded. Their recorded partial movies are spliced back into the concat
+# list in place of the skipped entries. A checkpoint is refused when the scene
+# source or render modes changed since it was written, and the fast-forwarded
+# scene is compared against the recorded camera state and digest.
+
+def checkpoint_path(name, quality, preview=False):
+    # Per quality and media tree: a finished preview must not delete a 4K render's checkpoint
+    return os.path.join(output_dir("checkpoints", quality, preview), f"{name}.json")
+
+def camera_state(camera):
+    state = {"frame_center": np.round(np.asarray(camera.frame_center, dtype=float), 6).tolist()}
+    if isinstance(camera, ThreeDCamera):
+        state.update({
+            "phi": round(float(camera.get_phi()), 6),
+            "theta": round(float(camera.get_theta()), 6),
+            "gamma": round(float(camera.get_gamma()), 6),
+            "zoom": round(float(camera.get_zoom()), 6),
+            "focal_distance": round(float(camera.get_focal_distance()), 6),
+        })
+    return state
+
+def scene_state_digest(scene):
+    """
+    Hash of the points, colours and z-order of every mobject in the scene.
+    Unlike background_fingerprint it is stable across processes, and values
+    are rounded so a fast-forward and a frame-by-frame run compare equal.
+    """
+    digest = hashlib.sha256()
+    for mob in extract_mobject_family_members(scene.mobjects, only_those_with_points=True):
+        digest.update(f"{type(mob).__name__}:{mob.z_index}".encode("utf-8"))
+        # + 0.0 turns -0.0 into 0.0 so rounding to zero from either side hashes the same
+        digest.update((np.round(mob.points, 4) + 0.0).tobytes())
+        if isinstance(mob, VMobject):
+            digest.update((np.round(mob.get_stroke_rgbas(), 4) + 0.0).tobytes())
+            digest.update((np.round(mob.get_fill_rgbas(), 4) + 0.0).tobytes())
+    return digest.hexdigest()
+
+def write_checkpoint(path, checkpoint):
+    # Written aside and renamed so a render killed mid-write leaves the previous checkpoint
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(f"{path}.tmp", "w", encoding="utf-8") as file:
+        json.dump(checkpoint, file, indent=2)
+    os.replace(f"{path}.tmp", path)
+
+def load_checkpoint(path, source_hash, render_modes):
+    """The checkpoint at path, or None if there is none or it belongs to a different render."""
+    if not os.path.exists(path):
+        return None
+    with open(path, "r", encoding="utf-8") as file:
+        checkpoint = json.load(file)
+    if checkpoint["source_hash"] != source_hash or checkpoint["render_modes"] != render_modes:
+        logger.warning(f"{path} was written for a different scene source or render modes, ignoring it")
+        return None
+    missing = [movie for movie in checkpoint["partial_movie_files"] if movie and not os.path.exists(movie)]
+    if missing:
+        logger.warning(f"Partial movies recorded in {path} are gone ({missing[0]}, ...), ignoring it")
+        return None
+    return checkpoint
+
+def _checkpointing_add_partial_movie_file(self, hash_animation):
+    movies = self.sections[-1].partial_movie_files
+    count = len(movies)
+    _checkpoint_original_add_partial_movie_file(self, hash_animation)
+    if len(movies) == count:
+        return
+    index = len(_checkpoint["partial_movie_files"])
+    resume = _checkpoint["resume"]
+    if resume is not None and index < resume["animation_index"]:
+        # A fast-forwarded animation: use the movie the interrupted render wrote for it
+        movies[-1] = resume["partial_movie_files"][index]
+    _checkpoint["partial_movie_files"].append(movies[-1])
+
+def _checkpointing_play(self, scene, *args, **kwargs):
+    _checkpoint_original_play(self, scene, *args, **kwargs)
+    resume = _checkpoint["resume"]
+    if resume is not None and self.num_plays == resume["animation_index"]:
+        if camera_state(self.camera) != resume["camera"] or scene_state_digest(scene) != resume["scene_digest"]:
+            logger.warning(
+                f"Scene state after fast-forwarding to animation {self.num_plays} differs from the "
+                "checkpoint; the resumed footage may not line up with the recorded partial movies"
+            )
+        else:
+            logger.info(f"Resumed at animation {self.num_plays}")
+    if resume is not None and self.num_plays <= resume["animation_index"]:
+        return
+
+    if time.perf_counter() - _checkpoint["last_write"] >= _checkpoint["interval"]:
+        save_checkpoint(self, scene)
+
+def save_checkpoint(renderer, scene):
+    """Writes the checkpoint for the animation boundary the renderer is at."""
+    write_checkpoint(_checkpoint["path"], {
+        "scene": type(scene).__name__,
+        "source_hash": _checkpoint["source_hash"],
+        "render_modes": _checkpoint["render_modes"],
+        "animation_index": renderer.num_plays,
+        "time": renderer.time,
+        "partial_movie_files": _checkpoint["partial_movie_files"],
+        "camera": camera_state(renderer.camera),
+        "scene_digest": scene_state_digest(scene),
+    })
+    _checkpoint["last_write"] = time.perf_counter()
+
+_checkpoint_original_play = CairoRenderer.play
+_checkpoint_original_add_partial_movie_file = SceneFileWriter.add_partial_movie_file
+_checkpoint = {}
+
+def enable_checkpoints(path, interval, source_hash, render_modes, resume=None):
+    global _checkpoint_original_play
+    # Chains onto preview timing or profiling when they are enabled first
+    _checkpoint_original_play = CairoRenderer.play
+    _checkpoint.update(
+        path=path, interval=interval, source_hash=source_hash, render_modes=render_modes,
+        resume=resume, partial_movie_files=[], last_write=time.perf_counter(),
+    )
+    CairoRenderer.play = _checkpointing_play
+    SceneFileWriter.add_partial_movie_file = _checkpointing_add_partial_movie_file
+
+# --- BOUNDED FOOTPRINT ---
+# Scenes with hundreds of short plays leave as many partial movies on disk
+# until the final concat, and mobjects that were faded to zero opacity (rather
+# than removed with FadeOut) stay in scene.mobjects and keep being sorted and
+# checked every frame. With a disk budget, finished partial movies are
+# concatenated (stream copy, no re-encode) into a rolling segment whenever the
+# unmerged ones exceed the budget, and the merged files are deleted. After
+# every play, top-level mobjects that are entirely transparent and have no
+# updaters are dropped from the scene; animating or adding one again brings
+# it back, on top (one made visible with a bare set_opacity must be re-added,
+# which no scene here does). With a memory budget, whenever the RSS goes over
+# it after a play, the unmerged partial movies are merged right away, the
+# cached background frame is released (it is redrawn at the next play) and a
+# garbage collection runs. Peak partial-movie disk usage and RSS are written
+# to media/footprint/<quality dir>.
+
+def current_rss_mb():
+    with open("/proc/self/statm", "r", encoding="utf-8") as file:
+        resident_pages = int(file.read().split()[1])
+    return resident_pages * os.sysconf("SC_PAGE_SIZE") / 2**20
+
+def directory_mb(path):
+    return sum(entry.stat().st_size for entry in os.scandir(path) if entry.is_file()) / 2**20
+
+def is_faded_out(mobject):
+    family = mobject.family_members_with_points()
+    return bool(family) and all(
+        isinstance(mob, VMobject)
+        and not mob.get_stroke_opacities().any()
+        and not mob.get_fill_opacities().any()
+        for mob in family
+    )
+
+def drop_faded_mobjects(scene):
+    # Foreground (and fixed-in-frame) mobjects keep their place; they are few
+    faded = [
+        mob for mob in scene.mobjects
+        if mob not in scene.foreground_mobjects
+        and is_faded_out(mob)
+        and not any(m.updaters for m in mob.get_family())
+    ]
+    if faded:
+        scene.remove(*faded)
+    return len(faded)
+
+def concat_movies(paths, output_path):
+    list_path = f"{output_path}.txt"
+    with open(list_path, "w", encoding="utf-8") as file:
+        file.writelines(f"file '{os.path.abspath(path)}'\n" for path in paths)
+    command = [
+        "ffmpeg", "-y", "-loglevel", "error", "-f", "concat", "-safe", "0",
+        "-i", list_path, "-c", "copy", output_path,
+    ]
+    subprocess.run(command, check=True)
+    os.remove(list_path)
+
+def merge_pending_movies(file_writer):
+    """Replaces the unmerged partial movies with one segment, in the concat list and on disk."""
+    pending = [path for _, path in _footprint["pending"]]
+    first_index = _footprint["pending"][0][0] if pending else None
+    _footprint["pending"], _footprint["pending_mb"] = [], 0.0
+    if len(pending) < 2:
+        return
+    # Named after the first animation it holds, so a resumed render never
+    # writes over a segment that an earlier process merged and a checkpoint lists
+    segment = os.path.join(file_writer.partial_movie_directory, f"segment_{first_index:05d}.mp4")
+    concat_movies(pending, segment)
+    _footprint["segments"] += 1
+
+    # The segment takes the concat position of the first movie, the others drop out
+    merged = set(pending)
+    for movies in (file_writer.sections[-1].partial_movie_files, _checkpoint.get("partial_movie_files", [])):
+        for i, path in enumerate(movies):
+            if path in merged:
+                movies[i] = segment if path == pending[0] else None
+    # Deleted at the end of the play, once a checkpoint no longer lists them
+    _footprint["merged"] += pending
+
+def _footprint_end_animation(self, allow_write=False):
+    _footprint_previous_end_animation(self, allow_write)
+    if not allow_write:
+        return
+    # end_animation runs before the renderer counts the play, so num_plays is this animation's index
+    _footprint["pending"].append((self.renderer.num_plays, self.partial_movie_file_path))
+    _footprint["pending_mb"] += os.path.getsize(self.partial_movie_file_path) / 2**20
+    if _footprint["pending_mb"] >= _footprint["disk_budget"]:
+        merge_pending_movies(self)
+
+def relieve_memory(renderer):
+    """Frees what the render holds on to between plays, once the RSS is over the memory budget."""
+    merge_pending_movies(renderer.file_writer)
+    for name in ("background_key", "background_image"):
+        renderer.__dict__.pop(name, None)
+    gc.collect()
+    _footprint["memory_reliefs"] += 1
+
+def _footprint_play(self, scene, *args, **kwargs):
+    _footprint_original_play(self, scene, *args, **kwargs)
+    _footprint["dropped"] += drop_faded_mobjects(scene)
+    rss = current_rss_mb()
+    if _footprint["memory_budget"] and rss > _footprint["memory_budget"]:
+        relieve_memory(self)
+        rss = current_rss_mb()
+    _footprint["peak_rss_mb"] = max(_footprint["peak_rss_mb"], rss)
+
+    if _footprint["merged"]:
+        if _checkpoint:
+            # The checkpoint on disk may still list the merged movies; a resume
+            # from it would find them gone and start over
+            save_checkpoint(self, scene)
+        for path in _footprint["merged"]:
+            os.remove(path)
+        _footprint["merged"] = []
+    if hasattr(self.file_writer, "partial_movie_directory"):
+        disk = directory_mb(self.file_writer.partial_movie_directory)
+        _footprint["peak_disk_mb"] = max(_footprint["peak_disk_mb"], disk)
+
+_footprint_original_play = CairoRenderer.play
+_footprint_previous_end_animation = None
+_footprint = {}
+
+def enable_footprint(disk_budget, memory_budget):
+    """disk_budget in MB of unmerged partial movies (0: never merge); memory_budget in MB of RSS (0: none)."""
+    global _footprint_original_play, _footprint_previous_end_animation
+    # Chains onto static holds, so held frames are padded before they are merged
+    _footprint_previous_end_animation = SceneFileWriter.end_animation
+    _footprint_original_play = CairoRenderer.play
+    _footprint.update(
+        disk_budget=disk_budget or float("inf"), memory_budget=memory_budget,
+        pending=[], pending_mb=0.0, merged=[], segments=0, dropped=0, memory_reliefs=0,
+        peak_disk_mb=0.0, peak_rss_mb=0.0,
+    )
+    # Partial movies are tracked for either budget: the memory budget merges them early too
+    SceneFileWriter.end_animation = _footprint_end_animation
+    CairoRenderer.play = _footprint_play
+
+def write_footprint(name, directory):
+    os.makedirs(directory, exist_ok=True)
+    report = {
+        "scene": name,
+        "peak_disk_mb": round(_footprint["peak_disk_mb"], 1),
+        # ru_maxrss is in kilobytes on Linux, and covers the whole process, i.e. this scene
+        "peak_rss_mb": round(max(_footprint["peak_rss_mb"], resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024), 1),
+        "segments": _footprint["segments"],
+        "dropped_mobjects": _footprint["dropped"],
+        "memory_reliefs": _footprint["memory_reliefs"],
+    }
+    path = os.path.join(directory, f"{name}.json")
+    with open(path, "w", encoding="utf-8") as file:
+        json.dump(report, file, indent=2)
+    logger.info(f"{name}: peak partial movies {report['peak_disk_mb']} MB, peak RSS {report['peak_rss_mb']} MB")
+    return path
+
+# --- DRY RUN ---
+# The null renderer runs construct and every animation (so mobjects end up in
+# the same state as in a real render) but never rasterizes or encodes a frame.
+# Each play/wait is recorded with its start/end time and the line of
+# the scene file it was called from.
+
+class NullRenderer(CairoRenderer):
+    def __init__(self, camera_class=None, scene_file=None):
+        super().__init__(camera_class=camera_class, skip_animations=True)
+        self.scene_file = os.path.abspath(scene_file) if scene_file else None
+        self.timeline = []
+
+    def caller_line(self):
+        frame = sys._getframe(2)
+        while frame is not None:
+            if os.path.abspath(frame.f_code.co_filename) == self.scene_file:
+                return frame.f_lineno
+            frame = frame.f_back
+        return None
+
+    def play(self, scene, *args, **kwargs):
+        line = self.caller_line()
+        start = self.timeline[-1]["end"] if self.timeline else 0.0
+        super().play(scene, *args, **kwargs)
+        self.timeline.append({
+            "index": len(self.timeline),
+            "start": round(start, 6),
+            "end": round(start + scene.duration, 6),
+            "duration": round(scene.duration, 6),
+            "line": line,
+        })
+
+    def update_frame(self, *args, **kwargs):
+        pass
+
+    def save_static_frame_data(self, scene, static_mobjects):
+        self.static_image = None
+
+    def get_frame(self):
+        return None
+
+    def add_frame(self, frame, num_frames=1):
+        pass
+
+def scene_timeline(filepath, scene_name):
+    """Runs the scene on a NullRenderer and returns its play/wait timeline."""
+    scene_class = load_scene_class(filepath, scene_name)
+    camera_class = ThreeDCamera if issubclass(scene_class, ThreeDScene) else Camera
+    renderer = NullRenderer(camera_class=camera_class, scene_file=filepath)
+    with tempconfig({
+        "input_file": filepath,
+        "write_to_movie": False,
+        "save_last_frame": False,
+        "disable_caching": True,
+    }):
+        scene_class(renderer=renderer).render()
+    return renderer.timeline
+
+def animation_durations(filepath, scene_name):
+    """Run time of every play/wait in the scene, in order, without rendering."""
+    return [entry["duration"] for entry in scene_timeline(filepath, scene_name)]
+
+def split_animations(durations, num_slices):
+    """
+    Splits the animation indices into num_slices contiguous, inclusive
+    (start, end) ranges with roughly equal total run time (fewer only if there
+    are fewer animations). A slice closes at the animation that brings it
+    nearest its share of the run time, or when the animations left are just
+    enough for the slices left, so a long animation at the end gets its own.
+    """
+    num_slices = max(1, min(num_slices, len(durations)))
+    target = sum(durations) / num_slices
+    ranges = []
+    start = 0
+    elapsed = 0
+    for index, duration in enumerate(durations):
+        elapsed += duration
+        remaining_slices = num_slices - len(ranges) - 1
+        remaining_animations = len(durations) - index - 1
+        if not remaining_slices:
+            continue
+        boundary = target * (len(ranges) + 1)
+        nearest = abs(elapsed - boundary) <= abs(elapsed + durations[index + 1] - boundary)
+        if remaining_animations == remaining_slices or (nearest and remaining_animations > remaining_slices):
+            ranges.append((start, index))
+            start = index + 1
+    ranges.append((start, len(durations) - 1))
+    return ranges
+
+# --- RENDERING ---
+
+def load_scene_module(filepath):
+    directory, filename = os.path.split(os.path.abspath(filepath))
+    if directory not in sys.path:
+        sys.path.insert(0, directory)
+    return importlib.import_module(os.path.splitext(filename)[0])
+
+def load_scene_class(filepath, scene_name):
+    return getattr(load_scene_module(filepath), scene_name)
+
+def render_scene(filepath, scene_name, quality="h", static_holds=False, animations=None, output_file=None,
+                 profile=False, background_cache=False, coalesce=0, preview=False, ladder=None,
+                 checkpoint_interval=60, resume=False, disk_budget=0, memory_budget=0):
+    """
+    Renders one scene with manim's Python API, with the requested render modes
+    enabled. animations=(start, end) renders only that inclusive range of
+    animation indices; earlier ones are fast-forwarded without writing frames.
+    With profile=True a per-animation report is written to media/profiles/<quality dir>.
+    coalesce > 0 merges runs of plays into partial movies of at least that many seconds.
+    preview=True renders a low-resolution draft with cheaper mobjects into media_preview.
+    ladder=["k", "h", "l"] renders once at the top rung and encodes the others alongside.
+    Whole-scene renders write a checkpoint at most every checkpoint_interval
+    seconds (0 disables them); resume=True continues from the last one.
+    disk_budget (MB) bounds unmerged partial movies on disk; above memory_budget
+    (MB) of RSS pending movies are merged and cached frames released. Both
+    drop faded-out mobjects and write the peak footprint to media/footprint/<quality dir>.
+    """
+    if ladder:
+        # Ladder encoders only see frames that are actually drawn: static holds
+        # write a single frame and cached or skipped animations write none
+        if static_holds or animations is not None or preview:
+            raise ValueError("--ladder can't be combined with --static-holds, --animations or --preview")
+        quality = ladder_top(ladder)
+    footprint = disk_budget > 0 or memory_budget > 0
+    if footprint and coalesce > 0:
+        # Both rewrite the partial movie list; coalescing already keeps it short
+        raise ValueError("--disk-budget/--memory-budget can't be combined with --coalesce")
+
+    if static_holds:
+        enable_static_holds()
+    if background_cache:
+        enable_background_cache()
+    if coalesce > 0:
+        enable_coalescing(coalesce)
+    if preview:
+        enable_preview()
+    profiler = RenderProfiler(output_file or scene_name).install() if profile else None
+
+    # Coalesced runs and ladder encoders span animation boundaries, and slices
+    # are short enough to simply render again
+    checkpoints = checkpoint_interval > 0 and not (animations is not None or coalesce > 0 or ladder)
+    if resume and not checkpoints:
+        logger.warning("--resume only applies to whole-scene renders without --coalesce or --ladder")
+    if checkpoints:
+        name = output_file or scene_name
+        render_modes = {"quality": quality, "static_holds": static_holds, "preview": preview}
+        source_hash = scene_hashes(filepath, render_modes)[scene_name]
+        path = checkpoint_path(name, quality, preview)
+        checkpoint = load_checkpoint(path, source_hash, render_modes) if resume else None
+        enable_checkpoints(path, checkpoint_interval, source_hash, render_modes, checkpoint)
+    if footprint:
+        enable_footprint(disk_budget, memory_budget)
+
+    render_config = {"quality": QUALITY_NAMES[quality], "input_file": filepath}
+    if preview:
+        render_config.update(PREVIEW_CONFIG)
+    if animations is not None:
+        # Slices of one scene render side by side, so give every partial movie
+        # a per-index name instead of a cache hash another slice could clean up
+        render_config["from_animation_number"], render_config["upto_animation_number"] = animations
+        render_config["disable_caching"] = True
+    if output_file is not None:
+        render_config["output_file"] = output_file
+    if ladder or footprint:
+        # Merged segments (and ladder rungs) can't be reused under one animation's hash
+        render_config["disable_caching"] = True
+    if checkpoints and checkpoint is not None:
+        # Everything before the checkpoint is fast-forwarded
+        render_config["from_animation_number"] = checkpoint["animation_index"]
+        logger.info(f"Resuming {scene_name} from animation {checkpoint['animation_index']}")
+    if coalesce > 0:
+        # A merged partial movie holds several animations, so it can't be
+        # reused under the hash of the first one
+        render_config["disable_caching"] = True
+
+    scene_class = load_scene_class(filepath, scene_name)
+    with tempconfig(render_config):
+        logger.info(f"Rendering {scene_name} ({QUALITY_NAMES[quality]})")
+        if ladder:
+            enable_ladder(filepath, output_file or scene_name, ladder)
+        try:
+            scene_class().render()
+        finally:
+            close_ladder()
+    if footprint:
+        write_footprint(output_file or scene_name, output_dir("footprint", quality, preview))
+    if checkpoints and os.path.exists(path):
+        # The scene is complete, there is nothing left to resume
+        os.remove(path)
+
+    if profiler is not None:
+        report_path = profiler.write(output_dir("profiles", quality, preview))
+        logger.info(f"Render profile written to {report_path}")
+
+def build_parser():
+    parser = argparse.ArgumentParser(description="Render a single scene from bh_scene.py.")
+    parser.add_argument("filepath")
+    parser.add_argument("scene")
+    parser.add_argument("-q", "--quality", choices=QUALITY_NAMES, default="h")
+    parser.add_argument("--static-holds", action="store_true",
+                        help="Write static waits as one frame padded by ffmpeg")
+    parser.add_argument("--background-cache", action="store_true",
+                        help="Reuse the rasterized static background across animations")
+    parser.add_argument("--coalesce", type=float, default=0, metavar="SECONDS",
+                        help="Merge consecutive plays into partial movies of at least SECONDS")
+    parser.add_argument("--preview", action="store_true",
+                        help="Low-resolution draft with cheaper mobjects, written to media_preview")
+    parser.add_argument("--ladder", nargs="+", choices=QUALITY_NAMES, metavar="QUALITY",
+                        help="Render once at the highest of these qualities and encode all of them")
+    parser.add_argument("--animations", nargs=2, type=int, metavar=("START", "END"),
+                        help="Only render this inclusive range of animation indices")
+    parser.add_argument("--output-file", help="Name of the output video, without extension")
+    parser.add_argument("--profile", action="store_true",
+                        help="Write a per-animation timing report to media/profiles/<quality dir>")
+    parser.add_argument("--checkpoint-interval", type=float, default=60, metavar="SECONDS",
+                        help="Write a resumable checkpoint at most every SECONDS (0 disables)")
+    parser.add_argument("--resume", action="store_true",
+                        help="Continue from the last checkpoint of an interrupted render")
+    parser.add_argument("--disk-budget", type=float, default=0, metavar="MB",
+                        help="Merge partial movies into a segment whenever the unmerged ones exceed MB")
+    parser.add_argument("--memory-budget", type=float, default=0, metavar="MB",
+                        help="Above MB of RSS, merge pending partial movies, release the background cache and collect garbage")
+    parser.add_argument("--durations", action="store_true",
+                        help="Print the run time of every animation as JSON and exit")
+    return parser
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    if args.durations:
+        print(json.dumps(animation_durations(args.filepath, args.scene)))
+        return
+
+    render_scene(
+        args.filepath,
+        args.scene,
+        args.quality,
+        static_holds=args.static_holds,
+        background_cache=args.background_cache,
+        coalesce=args.coalesce,
+        preview=args.preview,
+        ladder=args.ladder,
+        animations=args.animations,
+        output_file=args.output_file,
+        profile=args.profile,
+        checkpoint_interval=args.checkpoint_interval,
+        resume=args.resume,
+        disk_budget=args.disk_budget,
+        memory_budget=args.memory_budget,
+    )
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,147 @@
+import argparse
+import ast
+import importlib
+import json
+import multiprocessing
+import os
+import socket
+import socketserver
+import sys
+import time
+
+from get_scenes import local_imports
+
+# Default socket the daemon listens on and clients connect to
+SOCKET_PATH = os.path.join("media", "render_daemon.sock")
+
+def watched_modules():
+    """Local modules the daemon has imported (bh_scene, lattice, ...) with their source files."""
+    root = os.path.dirname(os.path.abspath(__file__))
+    modules = {}
+    for name, module in list(sys.modules.items()):
+        path = getattr(module, "__file__", None)
+        if path and os.path.dirname(os.path.abspath(path)) == root and name != "__main__":
+            modules[name] = os.path.abspath(path)
+    return modules
+
+def reload_order(modules, scene_module):
+    """
+    Names of the watched modules with every module after the local modules it
+    imports, and the scene module last.
+    """
+    dependencies = {}
+    for name, path in modules.items():
+        with open(path, "r", encoding="utf-8") as file:
+            tree = ast.parse(file.read(), filename=path)
+        imported = local_imports(tree, os.path.dirname(path))
+        dependencies[name] = [
+            other for other, other_path in modules.items() if other_path in imported and other != name
+        ]
+
+    order = []
+    def visit(name, visiting=()):
+        if name in order or name in visiting:
+            return
+        for dependency in dependencies[name]:
+            visit(dependency, (*visiting, name))
+        order.append(name)
+
+    for name in sorted(modules, key=lambda name: name == scene_module):
+        visit(name)
+    if scene_module in order:
+        order.remove(scene_module)
+        order.append(scene_module)
+    return order
+
+class RenderDaemon(socketserver.UnixStreamServer):
+    """
+    Keeps manim and the scene module imported between renders. Each job is a
+    render.py argument list; it runs in a forked child, so it starts with
+    everything already imported while render modes and config changes made by
+    the job die with the child. Local modules are reloaded when their source
+    file changes on disk.
+    """
+    def __init__(self, socket_path, scene_file):
+        self.scene_file = scene_file
+        self.mtimes = {}
+        self.context = multiprocessing.get_context("fork")
+        if os.path.exists(socket_path):
+            os.remove(socket_path)
+        super().__init__(socket_path, RenderJobHandler)
+        self.warm_up()
+
+    def warm_up(self):
+        start = time.perf_counter()
+        from render import load_scene_module  # imports manim, profiler and friends
+
+        load_scene_module(self.scene_file)
+        self.record_mtimes()
+        print(f"[daemon] manim and {self.scene_file} imported in {time.perf_counter() - start:.1f}s", flush=True)
+
+    def record_mtimes(self):
+        self.mtimes = {name: os.path.getmtime(path) for name, path in watched_modules().items()}
+
+    def reload_changed(self):
+        """
+        Reloads every watched module if any of them changed. Modules bind
+        names from each other (bh_scene's SphereImpostor, render's
+        scene_hashes), so reloading only the edited one would leave the others
+        holding the old classes and functions.
+        """
+        modules = watched_modules()
+        changed = [name for name, path in modules.items() if os.path.getmtime(path) != self.mtimes.get(name)]
+        if not changed:
+            return
+        print(f"[daemon] {', '.join(sorted(changed))} changed, reloading local modules", flush=True)
+        scene_module = os.path.splitext(os.path.basename(self.scene_file))[0]
+        for name in reload_order(modules, scene_module):
+            importlib.reload(sys.modules[name])
+        self.record_mtimes()
+
+    def run_job(self, render_args):
+        self.reload_changed()
+        # Imported after the reload so an edit to render.py takes effect in this job
+        from render import main
+
+        start = time.perf_counter()
+        process = self.context.Process(target=main, args=(render_args,))
+        process.start()
+        process.join()
+        return {"args": render_args, "exit_code": process.exitcode, "wall_time": time.perf_counter() - start}
+
+class RenderJobHandler(socketserver.StreamRequestHandler):
+    def handle(self):
+        job = json.loads(self.rfile.readline())
+        print(f"[daemon] job: {' '.join(job['args'])}", flush=True)
+        result = self.server.run_job(job["args"])
+        print(f"[daemon] finished in {result['wall_time']:.1f}s (exit {result['exit_code']})", flush=True)
+        self.wfile.write((json.dumps(result) + "\n").encode("utf-8"))
+
+def submit(render_args, socket_path=SOCKET_PATH):
+    """Sends a render.py argument list to a running daemon and waits for the result."""
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as client:
+        client.connect(socket_path)
+        client.sendall((json.dumps({"args": render_args}) + "\n").encode("utf-8"))
+        with client.makefile("r", encoding="utf-8") as response:
+            return json.loads(response.readline())
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Warm render worker for bh_scene.py.")
+    parser.add_argument("--socket", default=SOCKET_PATH)
+    commands = parser.add_subparsers(dest="command", required=True)
+    serve = commands.add_parser("serve", help="Start the daemon")
+    serve.add_argument("filepath", nargs="?", default="bh_scene.py")
+    render = commands.add_parser("render", help="Submit a job, e.g. render -- -ql bh_scene.py Outro")
+    render.add_argument("render_args", nargs=argparse.REMAINDER)
+    args = parser.parse_args()
+
+    if args.command == "serve":
+        os.makedirs(os.path.dirname(args.socket) or ".", exist_ok=True)
+        with RenderDaemon(args.socket, args.filepath) as daemon:
+            print(f"[daemon] listening on {args.socket}", flush=True)
+            daemon.serve_forever()
+    else:
+        render_args = [arg for arg in args.render_args if arg != "--"]
+        result = submit(render_args, args.socket)
+        print(f"exit {result['exit_code']} in {result['wall_time']:.1f}s")
+        sys.exit(result["exit_code"])
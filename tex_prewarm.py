@@ -0,0 +1,84 @@
+import ast
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from concurrent.futures.process import BrokenProcessPool
+
+# Mobjects that compile LaTeX when they are constructed
+TEX_CLASSES = ("MathTex", "Tex")
+
+# Keyword arguments that change the compiled tex file. font_size and colours
+# only scale and paint the SVG, so calls differing in them share one compile
+TEX_KEYWORDS = ("substrings_to_isolate", "arg_separator", "tex_environment")
+
+def extract_tex_calls(filepath):
+    """
+    Statically collects every MathTex/Tex call in filepath whose tex strings are
+    literals. Returns a list of (class_name, args, kwargs) in order of
+    appearance, with one entry per distinct tex file, so no two workers compile
+    into the same output paths; calls built from variables are skipped.
+    """
+    with open(filepath, "r", encoding="utf-8") as file:
+        tree = ast.parse(file.read(), filename=filepath)
+
+    calls = []
+    seen = set()
+    for node in ast.walk(tree):
+        if not (isinstance(node, ast.Call) and isinstance(node.func, ast.Name)):
+            continue
+        if node.func.id not in TEX_CLASSES:
+            continue
+        try:
+            args = tuple(ast.literal_eval(arg) for arg in node.args)
+        except ValueError:
+            continue
+        kwargs = {}
+        for keyword in node.keywords:
+            if keyword.arg in TEX_KEYWORDS:
+                try:
+                    kwargs[keyword.arg] = ast.literal_eval(keyword.value)
+                except ValueError:
+                    pass
+
+        key = (node.func.id, args, repr(sorted(kwargs.items())))
+        if key not in seen:
+            seen.add(key)
+            calls.append((node.lineno, node.func.id, args, kwargs))
+
+    calls.sort(key=lambda x: x[0])
+    return [(class_name, args, kwargs) for _, class_name, args, kwargs in calls]
+
+def compile_tex(class_name, args, kwargs, media_dir="media"):
+    """Builds the mobject once so its SVG lands in manim's tex cache (<media_dir>/Tex)."""
+    import manim
+
+    with manim.tempconfig({"media_dir": media_dir}):
+        getattr(manim, class_name)(*args, **kwargs)
+    return class_name, args
+
+def prewarm(filepath, workers=None, media_dir="media"):
+    """
+    Compiles every literal tex string in filepath concurrently before any scene
+    renders, into the tex cache of the media tree the renders will use.
+    """
+    calls = extract_tex_calls(filepath)
+    start = time.perf_counter()
+    failures = 0
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = [pool.submit(compile_tex, *call, media_dir) for call in calls]
+        for future in as_completed(futures):
+            try:
+                future.result()
+            except (ValueError, OSError, BrokenProcessPool) as error:
+                # The scene render reports the real error with full context
+                failures += 1
+                print(f"[tex] failed to pre-compile: {error}", flush=True)
+
+    print(f"[tex] pre-warmed {len(calls) - failures}/{len(calls)} tex strings "
+          f"in {time.perf_counter() - start:.1f}s", flush=True)
+    return failures
+
+if __name__ == "__main__":
+    import sys
+
+    prewarm(sys.argv[1] if len(sys.argv) > 1 else "bh_scene.py")
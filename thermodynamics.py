@@ -0,0 +1,59 @@
+import numpy as np
+
+# SI values (CODATA 2018; h, c and k_B are exact)
+G = 6.67430e-11
+C = 299792458.0
+H = 6.62607015e-34
+HBAR = H / (2 * np.pi)
+K_B = 1.380649e-23
+SOLAR_MASS = 1.98847e30
+
+PLANCK_LENGTH = np.sqrt(HBAR * G / C**3)
+PLANCK_MASS = np.sqrt(HBAR * C / G)
+
+# Every quantity is a power law in M, so in log10 it is one constant plus a
+# multiple of log10(M); the constants are folded once here
+LOG10_RS_CONSTANT = np.log10(2 * G / C**2)
+LOG10_N_CONSTANT = np.log10(4 * G / (H * C))
+LOG10_AREA_CONSTANT = np.log10(16 * np.pi * G**2 / C**4)
+LOG10_K_B = np.log10(K_B)
+LOG10_PLANCK_AREA_X4 = np.log10(4 * PLANCK_LENGTH**2)
+
+# All fields are base-10 logarithms of SI values; entropies are also given
+# in units of k_B, which is the number the scenes talk about
+BLACK_HOLE_DTYPE = np.dtype([
+    ("log10_mass", np.float64),          # kg
+    ("log10_radius", np.float64),        # r_s = 2GM/c^2, m
+    ("log10_photons", np.float64),       # N = 4GM^2/hc, the photon count of TwoDBlackHole
+    ("log10_area", np.float64),          # A = 16 pi G^2 M^2/c^4, m^2
+    ("log10_entropy", np.float64),       # S = k_B A / 4 l_P^2, J/K
+    ("log10_entropy_kb", np.float64),    # S / k_B = A / 4 l_P^2
+    ("log10_photon_entropy_kb", np.float64),  # S / k_B = N, the estimate before the area law
+])
+
+def black_hole_properties(log10_masses):
+    """
+    Horizon radius, photon count, area and entropy of Schwarzschild black
+    holes, evaluated entirely in log10 so Planck-mass and supermassive holes
+    share one array without overflow. Takes log10 of the masses in kg and
+    returns a structured array of BLACK_HOLE_DTYPE with the same shape.
+    """
+    log10_masses = np.asarray(log10_masses, dtype=np.float64)
+    result = np.empty(log10_masses.shape, dtype=BLACK_HOLE_DTYPE)
+    result["log10_mass"] = log10_masses
+    result["log10_radius"] = LOG10_RS_CONSTANT + log10_masses
+    result["log10_photons"] = LOG10_N_CONSTANT + 2 * log10_masses
+    result["log10_area"] = LOG10_AREA_CONSTANT + 2 * log10_masses
+    result["log10_entropy_kb"] = result["log10_area"] - LOG10_PLANCK_AREA_X4
+    result["log10_entropy"] = result["log10_entropy_kb"] + LOG10_K_B
+    result["log10_photon_entropy_kb"] = result["log10_photons"]
+    return result
+
+def mass_sweep(num=1000, low=PLANCK_MASS, high=1e10 * SOLAR_MASS):
+    """black_hole_properties for num masses evenly spaced in log between low and high (kg)."""
+    return black_hole_properties(np.linspace(np.log10(low), np.log10(high), num))
+
+def to_linear(log10_values):
+    """Converts a log10 field back to SI values; entries beyond float64 become inf."""
+    with np.errstate(over="ignore"):
+        return np.power(10.0, log10_values)
@@ -0,0 +1,117 @@
+import argparse
+import json
+import os
+import re
+import sys
+
+from get_scenes import extract_class_names
+from render import scene_timeline
+
+# "05:26,800", "00:09:32,900" or "00:00:00" as used in the narration comments
+TIMESTAMP = r"\d{1,2}:\d{2}(?::\d{2})?(?:[,.]\d{1,3})?"
+
+# "[05:26,800 -> 05:52,960]" or "narration from 00:11,560 to 00:21,900"
+NARRATION_RANGE = re.compile(rf"({TIMESTAMP})\s*(?:->|to)\s*({TIMESTAMP})")
+
+# "Timestamps are relative to 04:55,560"
+SCENE_OFFSET = re.compile(rf"relative to\s+({TIMESTAMP})")
+
+def parse_timestamp(text):
+    """Seconds from a narration timestamp; three fields are hours:minutes:seconds."""
+    text = text.replace(",", ".")
+    fields = text.split(":")
+    seconds = 0.0
+    for field in fields:
+        seconds = seconds * 60 + float(field)
+    return seconds
+
+def narration_ranges(lines, start_line, end_line):
+    """
+    Maps each line number in [start_line, end_line] that carries a narration
+    range to (start, end) in seconds. A range on a comment-only line applies
+    to the next line of code, like the "# SYNC:" blocks above each play().
+    """
+    ranges = {}
+    pending = None
+    for lineno in range(start_line, end_line + 1):
+        line = lines[lineno - 1]
+        code, _, comment = line.partition("#")
+        match = NARRATION_RANGE.search(comment)
+        if not code.strip():
+            if match:
+                pending = match
+            continue
+        match = match or pending
+        pending = None
+        if match:
+            ranges[lineno] = (parse_timestamp(match.group(1)), parse_timestamp(match.group(2)))
+    return ranges
+
+def scene_source_span(lines, scene_name):
+    """First and last line of the class definition for scene_name."""
+    start = next(i for i, line in enumerate(lines, 1) if re.match(rf"class {scene_name}\b", line))
+    end = next((i - 1 for i, line in enumerate(lines, 1) if i > start and re.match(r"class \w", line)), len(lines))
+    return start, end
+
+def check_sync(filepath, scene_name, timeline, tolerance):
+    """
+    Compares the end time of each annotated play/wait with the end of its
+    narration range. When several calls share a line, the last one is used.
+    Returns a list of drift entries above tolerance.
+    """
+    with open(filepath, "r", encoding="utf-8") as file:
+        lines = file.read().splitlines()
+    start_line, end_line = scene_source_span(lines, scene_name)
+
+    offset_match = SCENE_OFFSET.search("\n".join(lines[start_line - 1:end_line]))
+    offset = parse_timestamp(offset_match.group(1)) if offset_match else 0.0
+    ranges = narration_ranges(lines, start_line, end_line)
+
+    last_on_line = {}
+    for entry in timeline:
+        if entry["line"] in ranges:
+            last_on_line[entry["line"]] = entry
+
+    drift = []
+    for lineno, entry in sorted(last_on_line.items()):
+        expected_end = ranges[lineno][1] - offset
+        delta = entry["end"] - expected_end
+        if abs(delta) > tolerance:
+            drift.append({
+                "index": entry["index"],
+                "line": lineno,
+                "end": entry["end"],
+                "expected_end": round(expected_end, 6),
+                "drift": round(delta, 6),
+            })
+    return drift
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Dry-run scenes and check their timing against the narration comments.")
+    parser.add_argument("filepath", nargs="?", default="bh_scene.py")
+    parser.add_argument("--scenes", nargs="+", help="Only check these scenes (default: all)")
+    parser.add_argument("--tolerance", type=float, default=0.5, help="Allowed drift in seconds")
+    parser.add_argument("-o", "--output", default=os.path.join("media", "timeline.json"))
+    args = parser.parse_args()
+
+    report = {}
+    for scene_name in args.scenes or extract_class_names(args.filepath):
+        timeline = scene_timeline(args.filepath, scene_name)
+        drift = check_sync(args.filepath, scene_name, timeline, args.tolerance)
+        report[scene_name] = {
+            "duration": timeline[-1]["end"] if timeline else 0.0,
+            "timeline": timeline,
+            "drift": drift,
+        }
+        for entry in drift:
+            print(f"[{scene_name}] animation {entry['index']} (line {entry['line']}) ends at "
+                  f"{entry['end']:.2f}s, narration ends at {entry['expected_end']:.2f}s "
+                  f"({entry['drift']:+.2f}s)")
+
+    os.makedirs(os.path.dirname(args.output) or ".", exist_ok=True)
+    with open(args.output, "w", encoding="utf-8") as file:
+        json.dump(report, file, indent=2)
+    print(f"Timeline for {len(report)} scenes written to {args.output}")
+
+    if any(scene["drift"] for scene in report.values()):
+        sys.exit(1)